@@ -0,0 +1,192 @@
+import sys
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from collections import namedtuple
+import numpy as np
+
+from ANA_Search_Algorithm import (DIFFICULTIES, SUCCESSORS, ANA_Search, Occupancy_Map, Search_Workspace,
+	distance_field, load_map)
+
+'''
+Reproducible, headless benchmark of the ANA* planner: the four difficulty maps (when their images are found)
+plus synthetic maps of increasing size and obstacle density, generated from a fixed seed. Every case reports
+its expansions per second, time to first and final solution and the peak memory of the search, and can be
+compared against a stored baseline with relative regression thresholds (the exit status is 1 on a regression).
+'''
+
+Benchmark_Case = namedtuple("Benchmark_Case", ["name", "map", "start", "goal"])
+
+DEFAULT_SIZES = (128, 256, 512)
+DEFAULT_DENSITIES = (0.1, 0.2, 0.3)
+
+#Side of the square obstacles of the synthetic maps
+BLOCK_SIZE = 4
+
+#Relative amount by which a measure may get worse than the baseline before it counts as a regression
+#(expansions are deterministic, so by default they may not grow at all)
+DEFAULT_THRESHOLDS = {"time": 0.25, "memory": 0.25, "expansions": 0.0}
+
+#Timings shorter than this many seconds in the baseline are too noisy to be compared
+DEFAULT_MIN_TIME = 0.05
+
+#The measures compared against the baseline, with the threshold that applies and whether higher is better
+COMPARED = (
+	("time_to_first_solution", "time", False),
+	("time_to_final_solution", "time", False),
+	("expansions_per_second", "time", True),
+	("peak_memory", "memory", False),
+	("expansions", "expansions", False),
+)
+
+def difficulty_cases(map_dir):
+	cases = []
+	for name, (start, goal) in DIFFICULTIES.items():
+		filename = os.path.join(map_dir, name)
+		if os.path.exists(filename):
+			cases.append(Benchmark_Case(name, load_map(filename), start, goal))
+	return cases
+
+#Number of random free cells tried when looking for the largest connected region of a synthetic map
+REGION_SAMPLES = 8
+
+#A width x (2/3 width) map of random square obstacles covering about density of it. The query runs between
+#the two ends of a longest shortest path (found by two farthest-cell sweeps) of the largest region we sampled,
+#so every synthetic query has a solution and crosses most of its region.
+def synthetic_case(width, density, seed):
+	height = width * 2 // 3
+	rng = np.random.default_rng(seed)
+	blocks = rng.random((-(-width // BLOCK_SIZE), -(-height // BLOCK_SIZE))) < density
+	occupied = np.kron(blocks, np.ones((BLOCK_SIZE, BLOCK_SIZE), dtype=bool))[:width, :height].copy()
+	map = Occupancy_Map(occupied)
+
+	free = np.flatnonzero(~occupied.reshape(-1))
+	samples = rng.choice(free, min(REGION_SAMPLES, len(free)), replace=False)
+	distances = max((distance_field(map, int(cell)) for cell in samples), key=lambda field: np.count_nonzero(field >= 0))
+	goal = int(np.argmax(distances))
+	start = int(np.argmax(distance_field(map, goal)))
+
+	return Benchmark_Case("synthetic-%d-%g" % (width, density), map, map.point(start), map.point(goal))
+
+def run_case(case, successors, time_limit=None):
+	deadline = None if time_limit is None else time.perf_counter() + time_limit
+	search = ANA_Search(case.map, case.start, case.goal, successors, Search_Workspace(case.map))
+	first = None
+	final = None
+	for solution in search.solutions(deadline):
+		if first is None:
+			first = solution
+		final = solution
+
+	return {
+		"expansions": search.expansions,
+		"time": search.elapsed,
+		"expansions_per_second": search.expansions / search.elapsed if search.elapsed > 0 else 0,
+		"time_to_first_solution": first.elapsed if first else None,
+		"time_to_final_solution": final.elapsed if final else None,
+		"cost": final.G if final else None,
+		"solutions": search.iterate,
+		"complete": search.done(),
+	}
+
+#Timings are the best of repeat runs, the peak memory (of everything allocated during the search, workspace
+#included) comes from a separate run under tracemalloc since tracing slows the search down
+def measure(case, successors, repeat, time_limit=None):
+	runs = [run_case(case, successors, time_limit) for i in range(repeat)]
+	result = min(runs, key=lambda run: run["time"])
+	for field in ("time_to_first_solution", "time_to_final_solution"):
+		times = [run[field] for run in runs if run[field] is not None]
+		result[field] = min(times) if times else None
+
+	tracemalloc.start()
+	try:
+		run_case(case, successors, time_limit)
+		result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+
+	result["name"] = case.name
+	result["size"] = list(case.map.size)
+	return result
+
+#Returns the regressions of the results against the baseline, as printable strings
+def compare(results, baseline, thresholds, min_time=DEFAULT_MIN_TIME):
+	regressions = []
+	baseline = {result["name"]: result for result in baseline}
+	for result in results:
+		reference = baseline.get(result["name"])
+		if reference is None:
+			continue
+		for field, threshold, higher_is_better in COMPARED:
+			old, new = reference.get(field), result.get(field)
+			if old is None or new is None or old == 0:
+				continue
+			if threshold == "time" and (reference["time"] if higher_is_better else old) < min_time:
+				continue
+			change = (old - new) / old if higher_is_better else (new - old) / old
+			if change > thresholds[threshold]:
+				regressions.append("%s: %s %.4g -> %.4g (%+.1f%%)" % (result["name"], field, old, new, change * 100))
+	return regressions
+
+def print_table(results, out=sys.stdout):
+	out.write("%-24s %11s %13s %10s %10s %10s %12s\n" % (
+		"case", "expansions", "expansions/s", "first (s)", "final (s)", "total (s)", "peak memory"))
+	for result in results:
+		first = result["time_to_first_solution"]
+		final = result["time_to_final_solution"]
+		out.write("%-24s %11d %13.0f %10s %10s %10.3f %10.1fMB\n" % (
+			result["name"], result["expansions"], result["expansions_per_second"],
+			"-" if first is None else "%.3f" % first, "-" if final is None else "%.3f" % final,
+			result["time"], result["peak_memory"] / 2**20))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless benchmark of the ANA* planner")
+    parser.add_argument("--map-dir", default=".", help="directory holding the difficulty maps (default: .)")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES),
+                        help="widths of the synthetic maps")
+    parser.add_argument("--densities", type=float, nargs="*", default=list(DEFAULT_DENSITIES),
+                        help="obstacle densities of the synthetic maps")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic maps")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per case (the best one is kept)")
+    parser.add_argument("--time-limit", type=float, help="wall-clock seconds allowed per run")
+    parser.add_argument("--successors", choices=sorted(SUCCESSORS), default="grid", help="successor generator")
+    parser.add_argument("--output", metavar="FILE", help="write the results to this JSON file")
+    parser.add_argument("--baseline", metavar="FILE", help="compare the results against this JSON file")
+    parser.add_argument("--max-slowdown", type=float, default=DEFAULT_THRESHOLDS["time"],
+                        help="allowed relative slowdown of the timings (default: %(default)s)")
+    parser.add_argument("--max-memory-growth", type=float, default=DEFAULT_THRESHOLDS["memory"],
+                        help="allowed relative growth of the peak memory (default: %(default)s)")
+    parser.add_argument("--max-expansion-growth", type=float, default=DEFAULT_THRESHOLDS["expansions"],
+                        help="allowed relative growth of the expansions (default: %(default)s)")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME,
+                        help="only compare timings of at least this many seconds in the baseline (default: %(default)s)")
+    args = parser.parse_args()
+
+    cases = difficulty_cases(args.map_dir)
+    for index, width in enumerate(args.sizes):
+        for density in args.densities:
+            cases.append(synthetic_case(width, density, args.seed + index))
+
+    results = []
+    for case in cases:
+        results.append(measure(case, SUCCESSORS[args.successors], args.repeat, args.time_limit))
+    print_table(results)
+
+    if args.output is not None:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=1)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        thresholds = {"time": args.max_slowdown, "memory": args.max_memory_growth,
+                      "expansions": args.max_expansion_growth}
+        regressions = compare(results, baseline, thresholds, args.min_time)
+        for regression in regressions:
+            print ("REGRESSION " + regression)
+        if regressions:
+            sys.exit(1)
+        print ("No regressions against " + args.baseline)
@@ -1,9 +1,18 @@
 import sys
+import argparse
+import csv
+import hashlib
+import json
+import os
+import tempfile
 from PIL import Image
 import copy
 import math
-from queue import PriorityQueue
+from heapq import heapify, heappop, heappush
 import time 
+from array import array
+from collections import OrderedDict, namedtuple
+import numpy as np
 
 '''
 These variables are determined at runtime and should not be changed or mutated by you
@@ -30,20 +39,54 @@ frontier = {}   # a dictionary of (x,y) tuples, representing nodes to expand to
 G = 1e15
 E = 1e15
 
+#The hard coded (start, end) positions of the search for each difficulty level
+DIFFICULTIES = {
+	"trivial.gif": ((8, 1), (20, 1)),
+	"medium.gif": ((8, 201), (110, 1)),
+	"hard.gif": ((10, 1), (401, 220)),
+	"very_hard.gif": ((1, 324), (580, 1)),
+}
+
 #Our entries for the open set (frontier) will be in the form of [e(s) g(s) (x,y)]
 #and since the next ideal node to search would be the node with the HIGHEST e(s) value
-#(i.e. smallest combination of cost so far and distance to go estimate) then we must reverse the queue
-#we do so by multiplying the e(s) key by -1 which reverses the order (largest e(s) becomes smallest)
-class Reverse_Queue(PriorityQueue):
+#(i.e. smallest combination of cost so far and distance to go estimate) then we must reverse the heap
+#we do so by storing the e(s) key multiplied by -1 which reverses the order (largest e(s) becomes smallest)
+#The heap is a plain (unlocked) list and the entries dictionary indexes the single live entry of every state,
+#so a better g(s) for a state that is already open replaces its entry (decrease-key) and the old entry is only
+#marked stale, to be skipped when it surfaces (lazy deletion) or dropped the next time the heap is rebuilt
+class Open_List:
+
+	def __init__(self):
+		self.heap = []
+		self.entries = {}
+
+	def __len__(self):
+		return len(self.entries)
+
+	def empty(self):
+		return not self.entries
 
 	def put(self, en):
-		en_2 = en[0] * -1, en[1], en[2]
-		PriorityQueue.put(self, en_2)
-	
+		entry = [en[0] * -1, en[1], en[2]]
+		self.entries[en[2]] = entry
+		heappush(self.heap, entry)
+
 	def get(self):
-		en = PriorityQueue.get(self)
-		en_2 = en[0] * -1, en[1], en[2]
-		return en_2
+		heap = self.heap
+		entries = self.entries
+		while heap:
+			entry = heappop(heap)
+			#an entry is live only if it is still the one indexed for its state
+			if entries.get(entry[2]) is entry:
+				del entries[entry[2]]
+				return entry[0] * -1, entry[1], entry[2]
+		raise IndexError("get from an empty open list")
+
+	#Replaces the contents of the open list with the given (already re-keyed) entries using a single heapify
+	def rebuild(self, entries):
+		self.entries = entries
+		self.heap = list(entries.values())
+		heapify(self.heap)
 
 #This method is to compute the h(s) function (straight line estimate)
 def eucledian(p1, p2):
@@ -51,52 +94,478 @@ def eucledian(p1, p2):
 	(x2, y2) = p2
 	return math.sqrt((x1 - x2)**2 + (y1 - y2)**2) #Euclidean Distance
 
+#The h(s) function of the search, bound to a map and a goal and called with cell ids
+def eucledian_heuristic(map, goal):
+	height = map.height
+	goal = divmod(goal, height)
+
+	def heuristic(cell):
+		return eucledian(divmod(cell, height), goal)
+
+	return heuristic
+
 #This method is to compute e(s)
 def compute_e(G, g, h):
 	e = (G - g)/(h + 1e-15) #To avoid crash when e(s) is computed for goal node
 	return e
 
+#Bits of the per-pixel neighbor mask, one for each move traverse_nodes is allowed to make
+#(a bit is set when the neighbor in that direction is on the grid and is not an obstacle)
+RIGHT = 1   #(x+1, y)
+DOWN = 2    #(x, y+1)
+UP = 4      #(x, y-1)
+LEFT = 8    #(x-1, y)
+
+#For every possible mask value, the (dx, dy) moves it allows (in the order the successors are generated)
+MOVES = tuple(
+	tuple(move for bit, move in ((RIGHT, (1, 0)), (DOWN, (0, 1)), (UP, (0, -1)), (LEFT, (-1, 0))) if mask & bit)
+	for mask in range(16))
+
+#The map is decoded once into a NumPy occupancy array indexed [x, y] like the PIL PixelAccess object
+#(True where the pixel value is 1 i.e. occupied) together with the neighbor mask of every pixel, so that
+#expanding a node is a single lookup into a flat view of the masks instead of up to four calls into PIL
+#(both arrays may also be read-only memory maps of a prepared map file, see prepare_map)
+class Occupancy_Map:
+
+	def __init__(self, occupied, masks=None):
+		self.occupied = occupied
+		self.size = occupied.shape
+		self.width, self.height = self.size
+		self.masks = neighbor_masks(occupied) if masks is None else masks
+		#flat read-only views of the masks and of the occupancy, indexed by x * height + y
+		self.cells = memoryview(self.masks.reshape(-1))
+		self.blocked = memoryview(self.occupied.reshape(-1))
+
+		#for every possible mask value, the cell id offsets of the moves it allows
+		self.steps = tuple(tuple(dx * self.height + dy for dx, dy in moves) for moves in MOVES)
+
+		width, height, blocked = self.width, self.height, self.blocked
+
+		#is (x, y) on the grid and not an obstacle? (a closure rather than a method, it is called for every
+		#cell a jump walks over)
+		def free(x, y):
+			return 0 <= x < width and 0 <= y < height and not blocked[x * height + y]
+
+		self.free = free
+
+	#Cells are identified by their index in the flat views (cell ids), which is what the search works with
+	def cell(self, x, y):
+		return x * self.height + y
+
+	def point(self, cell):
+		return divmod(cell, self.height)
+
+def neighbor_masks(occupied):
+	free = ~occupied
+	masks = np.zeros(occupied.shape, dtype=np.uint8)
+
+	masks[:-1, :] |= free[1:, :] * np.uint8(RIGHT)
+	masks[:, :-1] |= free[:, 1:] * np.uint8(DOWN)
+	masks[:, 1:] |= free[:, :-1] * np.uint8(UP)
+	masks[1:, :] |= free[:-1, :] * np.uint8(LEFT)
+
+	return masks
+
+#O is unoccupied (white); 1 is occupied (black)
+def decode_map(filename):
+	im = Image.open(filename)
+	#NumPy arrays of images are indexed [y, x] so we transpose to keep the [x, y] convention of the search
+	occupied = (np.asarray(im) == 1).T.copy()
+	im.close()
+
+	return occupied
+
+#Bumped whenever the layout of prepared map files changes so that stale files are never loaded
+MAP_CACHE_VERSION = 1
+
+#Prepared maps are stored as a single uint8 .npy array of shape (2, width, height) holding the occupancy
+#and the neighbor masks, named after a hash of the image contents so that an edited image never reuses
+#an old file and any number of runs (or worker processes) can memory-map and share the same pages
+def map_cache_file(filename, cache_dir):
+	digest = hashlib.sha1(("ana-map-%d:" % MAP_CACHE_VERSION).encode())
+	with open(filename, "rb") as f:
+		for chunk in iter(lambda: f.read(1 << 20), b""):
+			digest.update(chunk)
+
+	return os.path.join(cache_dir, digest.hexdigest() + ".npy")
+
+#Map-preparation step: decodes the image and writes its prepared map file (only if it does not exist yet)
+def prepare_map(filename, cache_dir):
+	cache_file = map_cache_file(filename, cache_dir)
+	if os.path.exists(cache_file):
+		return cache_file
+
+	occupied = decode_map(filename)
+	save_cache_file(cache_file, np.stack((occupied.view(np.uint8), neighbor_masks(occupied))))
+
+	return cache_file
+
+#The file is written under a temporary name and renamed so that concurrent loaders never see half a file
+def save_cache_file(cache_file, array):
+	cache_dir = os.path.dirname(cache_file)
+	os.makedirs(cache_dir, exist_ok=True)
+	fd, temp_file = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+	try:
+		with os.fdopen(fd, "wb") as f:
+			np.save(f, array)
+		os.replace(temp_file, cache_file)
+	except BaseException:
+		os.remove(temp_file)
+		raise
+
+#Without a cache directory the image is decoded on every call, with one it is prepared once and memory-mapped
+def load_map(filename, cache_dir=None):
+	if cache_dir is None:
+		return Occupancy_Map(decode_map(filename))
+
+	layers = np.load(prepare_map(filename, cache_dir), mmap_mode="r")
+	return Occupancy_Map(layers[0].view(np.bool_), layers[1])
+
+#Exact grid distance (number of traverse_nodes moves) from the source cell to every cell of the map,
+#computed by a breadth-first search over the neighbor masks (-1 for the cells the source cannot reach)
+def distance_field(map, source):
+	cells = map.cells
+	steps = map.steps
+	distances = array("i", [-1]) * (map.width * map.height)
+	distances[source] = 0
+
+	frontier = [source]
+	distance = 0
+	while frontier:
+		distance += 1
+		next_frontier = []
+		for cell in frontier:
+			for step in steps[cells[cell]]:
+				successor = cell + step
+				if distances[successor] < 0:
+					distances[successor] = distance
+					next_frontier.append(successor)
+		frontier = next_frontier
+
+	return np.frombuffer(distances, dtype=np.int32)
+
+#Landmarks for the ALT (A*, Landmarks, Triangle inequality) heuristic: the exact distance fields of a few landmark
+#cells, from which |d(L, goal) - d(L, s)| is a lower bound on the distance from s to the goal for every landmark L.
+#Unlike the straight line estimate it follows the walls of the map, so on maze-like maps far fewer nodes are
+#expanded before the first solution. The distances are those of the 4-connected moves, so the heuristic is only
+#admissible for traverse_edges and jump_points_4 (not for the 8-connected jump_points_8).
+class Landmarks:
+
+	#fields is a (landmarks, cells) array, either int32 with -1 or uint16 with 65535 for unreachable cells
+	def __init__(self, fields):
+		self.fields = fields
+		self.unreachable = -1 if fields.dtype == np.int32 else np.iinfo(fields.dtype).max
+
+	#Picks the landmarks by farthest-point selection (every new landmark is the cell farthest from the ones we
+	#already have, starting from the cell farthest from the first free cell) and computes their distance fields
+	@classmethod
+	def compute(cls, map, count):
+		free = np.flatnonzero(~map.occupied.reshape(-1))
+		if count <= 0 or len(free) == 0:
+			return cls(np.empty((0, map.width * map.height), dtype=np.int32))
+
+		farthest = distance_field(map, int(free[0])).astype(np.int64)
+		fields = []
+		for i in range(count):
+			landmark = int(np.argmax(farthest))
+			if fields and farthest[landmark] <= 0:
+				break
+			field = distance_field(map, landmark)
+			fields.append(field)
+			reachable = np.where(field < 0, 0, field)
+			farthest = reachable if i == 0 else np.minimum(farthest, reachable)
+
+		fields = np.stack(fields)
+		#stored as 16-bit distances whenever they fit
+		if fields.max() < np.iinfo(np.uint16).max:
+			fields = np.where(fields < 0, np.iinfo(np.uint16).max, fields).astype(np.uint16)
+
+		return cls(fields)
+
+	#Heuristic factory (the same form as eucledian_heuristic) to pass to ANA_Search, ANA or astar
+	def heuristic(self, map, goal):
+		straight_line = eucledian_heuristic(map, goal)
+		unreachable = self.unreachable
+
+		#only the landmarks that can reach the goal give a bound
+		bounds = []
+		for field in self.fields:
+			field = memoryview(field)
+			if field[goal] != unreachable:
+				bounds.append((field[goal], field))
+
+		def heuristic(cell):
+			h = straight_line(cell)
+			for goal_distance, field in bounds:
+				distance = field[cell]
+				if distance == unreachable:
+					#the cell is not connected to the goal at all
+					return math.inf
+				if goal_distance - distance > h:
+					h = goal_distance - distance
+				elif distance - goal_distance > h:
+					h = distance - goal_distance
+			return h
+
+		return heuristic
+
+#Landmarks are stored next to the prepared map file (named after the same image hash) and memory-mapped
+def prepare_landmarks(filename, cache_dir, count):
+	cache_file = map_cache_file(filename, cache_dir)[:-len(".npy")] + ".landmarks-%d.npy" % count
+	if not os.path.exists(cache_file):
+		save_cache_file(cache_file, Landmarks.compute(load_map(filename, cache_dir), count).fields)
+
+	return cache_file
+
+def load_landmarks(filename, count, cache_dir=None):
+	if cache_dir is None:
+		return Landmarks.compute(load_map(filename), count)
+
+	return Landmarks(np.load(prepare_landmarks(filename, cache_dir, count), mmap_mode="r"))
+
+#Number of goal distance fields a Distance_Field_Cache keeps by default (each takes 4 bytes per pixel)
+DEFAULT_FIELD_CACHE_SIZE = 16
+
+#Estimated time to compute a distance field, per pixel, until the cache has measured one itself
+FIELD_SECONDS_PER_CELL = 1e-6
+
+#Routes from many starts to the same goal: the distance field of the goal (a breadth-first search from the goal
+#over the whole map) is computed once and kept in a least recently used cache keyed by (map, goal). Any start
+#is then answered in O(path length) by descending the field, i.e. repeatedly moving to a neighbor one move closer.
+#The paths are optimal for the 4-connected moves of traverse_nodes.
+class Distance_Field_Cache:
+
+	def __init__(self, capacity=DEFAULT_FIELD_CACHE_SIZE):
+		self.capacity = capacity
+		self.fields = OrderedDict()
+		self.seconds_per_cell = FIELD_SECONDS_PER_CELL
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, map, goal):
+		field = self.fields.get((map, goal))
+		if field is not None:
+			self.fields.move_to_end((map, goal))
+		return field
+
+	def field(self, map, goal):
+		field = self.get(map, goal)
+		if field is None:
+			start_t = time.perf_counter()
+			field = memoryview(distance_field(map, map.cell(*goal)))
+			self.seconds_per_cell = (time.perf_counter() - start_t) / len(field)
+
+			self.fields[(map, goal)] = field
+			while len(self.fields) > self.capacity:
+				self.fields.popitem(last=False)
+		return field
+
+	#would computing the field of this map fit in the given number of seconds?
+	def affordable(self, map, time_limit):
+		return time_limit is None or self.seconds_per_cell * map.width * map.height <= time_limit
+
+	def route(self, map, start, goal, time_limit=None):
+		"""
+		Returns the optimal path from start to goal ((x,y) tuples, empty if the goal cannot be reached), or None
+		when the field of the goal is not cached and computing it would not fit in time_limit seconds.
+		"""
+		field = self.get(map, goal)
+		if field is None:
+			self.misses += 1
+			if not self.affordable(map, time_limit):
+				return None
+			field = self.field(map, goal)
+		else:
+			self.hits += 1
+
+		return descend(map, field, map.cell(*start))
+
+#Gradient descent on a distance field: from the start, always move to the neighbor with a distance one smaller
+def descend(map, field, start):
+	distance = field[start]
+	if distance < 0:
+		return []
+
+	cells = map.cells
+	steps = map.steps
+	cell = start
+	path = [map.point(cell)]
+	while distance > 0:
+		distance -= 1
+		for step in steps[cells[cell]]:
+			if field[cell + step] == distance:
+				cell += step
+				break
+		path.append(map.point(cell))
+
+	return path
+
 #Note that nodes are only added to the results list if they are not off grid and are not an obstacle
-def traverse_nodes(map, size, node):
+#(both are already encoded in the neighbor mask of the node)
+def traverse_nodes(map, node):
 	x = node[0]
 	y = node[1]
+
+	return [(x + dx, y + dy) for dx, dy in MOVES[map.cells[x * map.height + y]]]
+
+#Successor generators are called as successors(map, cell, parent, goal) with cell ids (parent is -1 for the start)
+#and return (successor cell, cost) pairs
+#This is the plain one: every free neighbor of the node at a cost of 1 (the parent and goal are not needed)
+def traverse_edges(map, cell, parent, goal):
+	return [(cell + step, 1) for step in map.steps[map.cells[cell]]]
+
+#Jump Point Search (Harabor & Grastien) successor generators for uniform-cost grids
+#Instead of its neighbors, the successors of a node are the jump points found by walking in a straight line
+#in every direction not pruned by the direction we arrived from, skipping the cells in between (which an optimal
+#path would only ever cross in that same straight line). The cost of a successor is the length of its jump
+#and fill_path restores the skipped pixels of a path made of jump points.
+SQRT_2 = math.sqrt(2)
+
+def direction(node, parent):
+	dx = (node[0] > parent[0]) - (node[0] < parent[0])
+	dy = (node[1] > parent[1]) - (node[1] < parent[1])
+	return dx, dy
+
+#4-connected jump (the moves of traverse_nodes): walk from (x, y) in direction (dx, dy) and return the first
+#jump point i.e. the goal or a cell with a forced neighbor, or None when an obstacle or the map edge comes first
+def jump_4(map, x, y, dx, dy, goal):
+	free = map.free
+
+	while True:
+		x += dx
+		y += dy
+		if not free(x, y):
+			return None
+		if (x, y) == goal:
+			return (x, y)
+
+		if dx:
+			if (free(x, y - 1) and not free(x - dx, y - 1)) or (free(x, y + 1) and not free(x - dx, y + 1)):
+				return (x, y)
+		else:
+			if (free(x - 1, y) and not free(x - 1, y - dy)) or (free(x + 1, y) and not free(x + 1, y - dy)):
+				return (x, y)
+			#since we cannot move diagonally, a vertical jump must stop wherever a horizontal jump finds something
+			if jump_4(map, x, y, 1, 0, goal) is not None or jump_4(map, x, y, -1, 0, goal) is not None:
+				return (x, y)
+
+def jump_points_4(map, cell, parent, goal):
+	height = map.height
+	x, y = divmod(cell, height)
+	goal = divmod(goal, height)
+
+	if parent < 0:
+		directions = ((1, 0), (0, 1), (0, -1), (-1, 0))
+	else:
+		dx, dy = direction((x, y), divmod(parent, height))
+		if dx:
+			directions = ((dx, 0), (0, 1), (0, -1))
+		else:
+			directions = ((0, dy), (1, 0), (-1, 0))
+
 	results = []
+	for dx, dy in directions:
+		jump = jump_4(map, x, y, dx, dy, goal)
+		if jump is not None:
+			results.append((jump[0] * height + jump[1], abs(jump[0] - x) + abs(jump[1] - y)))
+
+	return results
+
+#8-connected jump: diagonal moves cost sqrt(2) and may not cut the corner of an obstacle
+#(a diagonal move is only allowed when both cells it passes between are free)
+def jump_8(map, x, y, dx, dy, goal):
+	free = map.free
+
+	while True:
+		x += dx
+		y += dy
+		if not free(x, y):
+			return None
+		if (x, y) == goal:
+			return (x, y)
+
+		if dx and dy:
+			#moving diagonally we must stop wherever one of the two straight jumps finds something
+			if jump_8(map, x, y, dx, 0, goal) is not None or jump_8(map, x, y, 0, dy, goal) is not None:
+				return (x, y)
+			if not (free(x + dx, y) and free(x, y + dy)):
+				return None
+		elif dx:
+			if (free(x, y - 1) and not free(x - dx, y - 1)) or (free(x, y + 1) and not free(x - dx, y + 1)):
+				return (x, y)
+		else:
+			if (free(x - 1, y) and not free(x - 1, y - dy)) or (free(x + 1, y) and not free(x + 1, y - dy)):
+				return (x, y)
+
+def jump_points_8(map, cell, parent, goal):
+	height = map.height
+	x, y = divmod(cell, height)
+	goal = divmod(goal, height)
+	free = map.free
+
+	if parent < 0:
+		directions = [(1, 0), (0, 1), (0, -1), (-1, 0)]
+		for dx, dy in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+			if free(x + dx, y) and free(x, y + dy):
+				directions.append((dx, dy))
+	else:
+		dx, dy = direction((x, y), divmod(parent, height))
+		if dx and dy:
+			directions = [(0, dy), (dx, 0)]
+			if free(x, y + dy) and free(x + dx, y):
+				directions.append((dx, dy))
+		elif dx:
+			directions = [(dx, 0), (0, 1), (0, -1)]
+			if free(x + dx, y):
+				directions += [(dx, side) for side in (1, -1) if free(x, y + side)]
+		else:
+			directions = [(0, dy), (1, 0), (-1, 0)]
+			if free(x, y + dy):
+				directions += [(side, dy) for side in (1, -1) if free(x + side, y)]
 
-	x_max = size[0]
-	y_max = size[1]
-
-        #Moving to the RIGHT 
-	if (x+1 < x_max) and (map[x+1,y] != 1):
-		results.append((x+1,y)) 
-        #Moving to the LEFT
-	if (y+1 < y_max) and (map[x,y+1] != 1): 
-		results.append((x,y+1))
-        #Moving UP
-	if (y>=1) and (map[x,y-1] != 1): 
-		results.append((x,y-1))
-        #Moving DOWN 
-	if (x>=1) and (map[x-1,y] != 1): 
-		results.append((x-1,y))
+	results = []
+	for dx, dy in directions:
+		jump = jump_8(map, x, y, dx, dy, goal)
+		if jump is not None:
+			steps = max(abs(jump[0] - x), abs(jump[1] - y))
+			results.append((jump[0] * height + jump[1], steps * SQRT_2 if dx and dy else steps))
 
 	return results
 
- 
-def prune(front, G, goal):
-	update_front = Reverse_Queue(0)
+#Successor generators by name (for the command line)
+SUCCESSORS = {"grid": traverse_edges, "jps": jump_points_4, "jps8": jump_points_8}
 
-	while not front.empty():
-		node = front.get()
-		e_s = node[0]
-		g_s = node[1]
-		state = node[2]
+#Restores every pixel of a path whose consecutive nodes are joined by straight or diagonal lines (jump points)
+def fill_path(path):
+	filled = path[:1]
+
+	for x, y in path[1:]:
+		px, py = filled[-1]
+		dx, dy = direction((x, y), (px, py))
+		while px != x or py != y:
+			if px != x:
+				px += dx
+			if py != y:
+				py += dy
+			filled.append((px, py))
 
-		h_s = eucledian(state, goal)
+	return filled
+
+#Every time G improves the e(s) keys of the whole open list change, so instead of draining it into a new queue
+#the surviving entries are re-keyed in place and the heap is rebuilt once (nodes with g(s) + h(s) >= G are dropped)
+def prune(front, G, heuristic):
+	survivors = {}
+
+	for state, entry in front.entries.items():
+		g_s = entry[1]
+		h_s = heuristic(state)
 
 		if g_s + h_s < G:
-			new_e_s = compute_e(G, g_s, h_s)
-			update_front.put((new_e_s, g_s, state))
-		
-	return update_front
+			entry[0] = compute_e(G, g_s, h_s) * -1
+			survivors[state] = entry
+
+	front.rebuild(survivors)
+	return front
 
 def print_stats(time_taken, G, E, iterate):
 
@@ -107,60 +576,319 @@ def print_stats(time_taken, G, E, iterate):
 	
 	return time_taken
 
-def ANA(map, size, start, goal):
-	#setting initial G and E values to infinity
-	global G, E
+#Each improved solution handed out by ANA_Search.solutions(), as soon as improve_solution reaches the goal
+#(elapsed is the time spent searching so far and expansions the total number of nodes expanded so far)
+Solution = namedtuple("Solution", ["path", "G", "E", "elapsed", "expansions"])
+
+#How many expansions improve_solution makes between two checks of its budget
+BUDGET_CHECK_INTERVAL = 1024
+
+#The limits of an anytime search: a wall-clock deadline (a time.perf_counter() value), a number of expansions
+#and/or a cancellation flag (anything with an is_set() method, such as a threading.Event)
+class Budget:
+
+	def __init__(self, deadline=None, max_expansions=None, cancel=None):
+		self.deadline = deadline
+		self.max_expansions = max_expansions
+		self.cancel = cancel
+		self.expansions = 0
+		self.stopped = False
+
+	#number of expansions at which improve_solution should check the budget again
+	def next_check(self):
+		check_at = self.expansions + BUDGET_CHECK_INTERVAL
+		if self.max_expansions is not None and self.max_expansions < check_at:
+			check_at = self.max_expansions
+		return check_at
+
+	def exhausted(self):
+		if self.max_expansions is not None and self.expansions >= self.max_expansions:
+			self.stopped = True
+		elif self.deadline is not None and time.perf_counter() >= self.deadline:
+			self.stopped = True
+		elif self.cancel is not None and self.cancel.is_set():
+			self.stopped = True
+		return self.stopped
+
+#Highest generation a stamp can hold before the stamps have to be cleared (they are unsigned 32-bit integers)
+STAMP_LIMIT = 2**32 - 1
+
+#The per-cell state of a search, bound to one map and reused by every query on it: g(s) and the parent of every
+#cell live in flat preallocated arrays indexed by cell id, and are only valid where the stamp of the cell equals
+#the current generation, so starting a new query (reset) invalidates all of them at once instead of allocating
+#new dictionaries. A workspace serves one query at a time, resetting it for a new query ends the previous one.
+class Search_Workspace:
+
+	def __init__(self, map):
+		self.map = map
+		cells = map.width * map.height
+		self.g = [0] * cells
+		self.parent = array("i", bytes(4 * cells))
+		self.stamp = array("I", bytes(4 * cells))
+		self.generation = 0
+
+	def reset(self):
+		if self.generation >= STAMP_LIMIT:
+			self.stamp = array("I", bytes(4 * len(self.stamp)))
+			self.generation = 0
+		self.generation += 1
+		return self.generation
+
+	def seen(self, cell):
+		return self.stamp[cell] == self.generation
+
+	#We construct the path by looping through the parent array to backtrack from the goal to the start
+	#(an empty path is returned while the goal has not been reached)
+	def path(self, start, goal):
+		if not self.seen(goal):
+			return []
+
+		path = []
+		current_node = goal
+		while current_node != start:
+			path.append(self.map.point(current_node))
+			current_node = self.parent[current_node]
+		path.append(self.map.point(start))
+		path.reverse()
+
+		return path
 
-	#keeping track of total times the imporve_solution method finds a new (better) solution
-	iterate = 0
-	#computing initial h(s) and e(s)
-	h_start = eucledian(start, goal)
-	e = compute_e(G, 0, h_start)
+	#The (x,y) tuples of every node given a g(s) value in the current query, with their g(s)
+	def explored(self):
+		stamps = np.frombuffer(self.stamp, dtype=np.uint32)
+		g = self.g
+		point = self.map.point
+		return {point(cell): g[cell] for cell in np.flatnonzero(stamps == self.generation).tolist()}
 
-	#inserting start node into open list
-	front = Reverse_Queue(0) 
-	front.put((e, 0, start))
+#Per-round instrumentation of an ANA_Search (a round being one call of improve_solution followed by prune)
+#Only collected when an ANA_Metrics object is given to the search, otherwise the rounds are not recorded at all
+class ANA_Metrics:
 
-	#dictionaries to keep track of node parent information and nodes already explored
-	parent_linked = {}
-	explored = {}
-	parent_linked[start] = None
-	explored[start] = 0
+	#the columns of a round record:
+	#stopped - the round was cut short by the budget (and will be continued by the next round)
+	#generated - successors generated, duplicates - successors that did not improve on their known g(s),
+	#reopened - successors that did improve on their known g(s), open_peak - largest open list size in the round
+	FIELDS = ("round", "stopped", "improved", "G", "E", "expansions", "generated", "duplicates", "reopened",
+		"open_peak", "open_after_prune", "improve_time", "prune_time")
 
-	time_step = 0
+	def __init__(self):
+		self.rounds = []
+		self.time_to_first_solution = None
+		self.expansions_to_first_solution = None
+
+	def totals(self):
+		totals = {"rounds": len(self.rounds),
+			"time_to_first_solution": self.time_to_first_solution,
+			"expansions_to_first_solution": self.expansions_to_first_solution}
+		for field in ("expansions", "generated", "duplicates", "reopened", "improve_time", "prune_time"):
+			totals[field] = sum(record[field] for record in self.rounds)
+		totals["open_peak"] = max([record["open_peak"] for record in self.rounds], default=0)
+		return totals
+
+	def to_dict(self):
+		return {"totals": self.totals(), "rounds": self.rounds}
+
+#Writes the metrics of one or more searches, given as (labels, ANA_Metrics) pairs where labels is a dictionary
+#identifying the search (e.g. its start and goal), as JSON or, if the filename ends in .csv, as one CSV row per round
+def export_metrics(filename, searches):
+	with open(filename, "w", newline="") as out:
+		if filename.endswith(".csv"):
+			labels = list(searches[0][0]) if searches else []
+			writer = csv.DictWriter(out, labels + list(ANA_Metrics.FIELDS))
+			writer.writeheader()
+			for search_labels, metrics in searches:
+				for record in metrics.rounds:
+					row = dict(search_labels)
+					row.update(record)
+					writer.writerow(row)
+		else:
+			records = []
+			for search_labels, metrics in searches:
+				record = dict(search_labels)
+				record.update(metrics.to_dict())
+				records.append(record)
+			json.dump(records, out, indent=1)
+
+#The state of one ANA* query, kept between calls so that the search is anytime: solutions() yields every improved
+#solution as soon as it is found and can be stopped by a budget (or by closing the generator) and resumed later
+#(pass the same workspace to every query on a map to reuse its arrays, and a heuristic factory such as
+#Landmarks.heuristic to replace the straight line estimate, and an ANA_Metrics object to record every round)
+class ANA_Search:
+
+	def __init__(self, map, start, goal, successors=traverse_edges, workspace=None, heuristic=eucledian_heuristic,
+		metrics=None):
+		self.map = map
+		self.metrics = metrics
+		self.start = start
+		self.goal = goal
+		self.successors = successors
+		self.workspace = Search_Workspace(map) if workspace is None else workspace
+		self.generation = self.workspace.reset()
+		self.start_cell = map.cell(*start)
+		self.goal_cell = map.cell(*goal)
+		self.heuristic = heuristic(map, self.goal_cell)
+
+		#setting initial G and E values to infinity
+		self.G = 1e15
+		self.E = 1e15
+
+		#keeping track of total times the imporve_solution method finishes a round
+		self.iterate = 0
+		self.expansions = 0
+		self.elapsed = 0
+
+		#computing initial h(s) and e(s)
+		h_start = self.heuristic(self.start_cell)
+		e = compute_e(self.G, 0, h_start)
+
+		#inserting start node into open list
+		self.front = Open_List()
+		self.front.put((e, 0, self.start_cell))
+
+		#the start node is the only one explored so far, and has no parent
+		self.workspace.stamp[self.start_cell] = self.generation
+		self.workspace.g[self.start_cell] = 0
+		self.workspace.parent[self.start_cell] = -1
+
+	def done(self):
+		return self.front.empty()
+
+	def path(self):
+		return fill_path(self.workspace.path(self.start_cell, self.goal_cell))
+
+	def explored(self):
+		return self.workspace.explored()
+
+	def frontier(self):
+		frontier = {}
+		for state, entry in self.front.entries.items():
+			frontier[self.map.point(state)] = entry[1]
+		return frontier
 
 	#Keep running the imporve_solution method until all nodes from the fronteir list are explored
-	while not front.empty():
-		iterate += 1
-		start_t = time.time()
-		parent_linked, explored, front, G, E = improve_solution(parent_linked, explored, front, G, E, map, size, start, goal)
-		end_t = time.time()
-		delta_t = end_t - start_t
-		
-		time_step = print_stats(delta_t + time_step, G, E, iterate)
-		front = prune(front, G, goal)
-		
-	path = []
-	current_node = goal
+	#or until the budget given for this call runs out
+	def solutions(self, deadline=None, max_expansions=None, cancel=None):
+		assert self.workspace.generation == self.generation, "The workspace was reset by another query"
+		budget = Budget(deadline, max_expansions, cancel)
+
+		while not self.front.empty():
+			start_t = time.perf_counter()
+			expansions = budget.expansions
+			record = None if self.metrics is None else {"round": len(self.metrics.rounds) + 1}
+			self.front, G, self.E = improve_solution(self.workspace, self.front, self.G, self.E, self.start_cell,
+				self.goal_cell, budget, self.successors, self.heuristic, record)
+			self.expansions += budget.expansions - expansions
+			improve_t = time.perf_counter()
+
+			if budget.stopped:
+				self.elapsed += improve_t - start_t
+				if record is not None:
+					self.record(record, True, False, improve_t - start_t, 0)
+				return
+
+			self.iterate += 1
+			improved = G < self.G
+			self.G = G
+			self.front = prune(self.front, G, self.heuristic)
+			end_t = time.perf_counter()
+			self.elapsed += end_t - start_t
 
-	#Now that improve_solution has been called until no more nodes remain in the open list,
-	#we can construct the path by looping through the parent_linked dictionary to backtrack to the start
-	while current_node != start:
-		path.append(current_node)
-		current_node = parent_linked[current_node]
-	path.append(start)
-	path.reverse()	
+			if record is not None:
+				self.record(record, False, improved, improve_t - start_t, end_t - improve_t)
 
-	frontier = {}
-	for f in front.queue:
-		frontier[f[2]] = f[1]
+			if improved:
+				yield Solution(self.path(), self.G, self.E, self.elapsed, self.expansions)
 
-	return path, explored, frontier, iterate
+	def record(self, record, stopped, improved, improve_time, prune_time):
+		record.update(stopped=stopped, improved=improved, G=self.G, E=self.E, open_after_prune=len(self.front),
+			improve_time=improve_time, prune_time=prune_time)
+		self.metrics.rounds.append(record)
+		if improved and self.metrics.time_to_first_solution is None:
+			self.metrics.time_to_first_solution = self.elapsed
+			self.metrics.expansions_to_first_solution = self.expansions
+
+def ANA(map, start, goal, successors=traverse_edges, heuristic=eucledian_heuristic, metrics=None):
+	global G, E
+
+	search = ANA_Search(map, start, goal, successors, heuristic=heuristic, metrics=metrics)
+	for solution in search.solutions():
+		print_stats(solution.elapsed, solution.G, solution.E, search.iterate)
+
+	#the last round is the one that empties the open list without improving the solution
+	print_stats(search.elapsed, search.G, search.E, search.iterate)
+	G, E = search.G, search.E
+
+	return search.path(), search.explored(), search.frontier(), search.iterate
+
+#Plain A* (f = g + h, stopping at the first time the goal is taken off the open list) with any successor generator
+#Returns the path, its cost (None if the goal cannot be reached) and the number of nodes expanded
+def astar(map, start, goal, successors=traverse_edges, workspace=None, heuristic=eucledian_heuristic):
+	if workspace is None:
+		workspace = Search_Workspace(map)
+	g = workspace.g
+	parent = workspace.parent
+	stamp = workspace.stamp
+	generation = workspace.reset()
+
+	start = map.cell(*start)
+	goal = map.cell(*goal)
+	heuristic = heuristic(map, goal)
+	stamp[start] = generation
+	g[start] = 0
+	parent[start] = -1
+	front = [(heuristic(start), 0, start)]
+	expansions = 0
+
+	while front:
+		f_s, g_s, state = heappop(front)
+		#skip entries that were superseded by a cheaper path to the same state
+		if g_s > g[state]:
+			continue
+
+		if state == goal:
+			return fill_path(workspace.path(start, goal)), g_s, expansions
+
+		expansions += 1
+		for successor, cost in successors(map, state, parent[state], goal):
+			new_cost = g_s + cost
+			if stamp[successor] != generation or new_cost < g[successor]:
+				stamp[successor] = generation
+				g[successor] = new_cost
+				parent[successor] = state
+				heappush(front, (new_cost + heuristic(successor), new_cost, successor))
+
+	return [], None, expansions
+
+#The nodes of the search are cell ids, their g(s) and parents are kept in the arrays of the workspace
+#(the counters of the round are written to the metrics dictionary when one is given, see ANA_Metrics)
+def improve_solution(workspace, front, G, E, start, goal, budget=None, successors=traverse_edges, heuristic=None,
+	metrics=None):
+	map = workspace.map
+	g = workspace.g
+	parent = workspace.parent
+	stamp = workspace.stamp
+	generation = workspace.generation
+	if heuristic is None:
+		heuristic = eucledian_heuristic(map, goal)
+	if budget is None:
+		budget = Budget()
+	expansions = budget.expansions
+	#The budget is checked before the first expansion too, so that a query that is already cancelled (or past its
+	#deadline) returns at once instead of running a whole check interval
+	check_at = expansions
+	first_expansion = expansions
+	generated = duplicates = reopened = 0
+	open_peak = len(front)
 
-def improve_solution(parent_linked, explored, front, G, E, map, size, start, goal):
 	#Note that in the ANA method, when the imporve_solution method is called:
-        #the front input is already given as a reversed queue so we do not have to reverse it again
+        #the front input is already given as a reversed heap so we do not have to reverse it again
 	while not front.empty():
+		if expansions >= check_at:
+			budget.expansions = expansions
+			if budget.exhausted():
+				break
+			check_at = budget.next_check()
+
 		current_node = front.get()
 		e_s = current_node[0]
 		g_s = current_node[1]
@@ -173,104 +901,258 @@ def improve_solution(parent_linked, explored, front, G, E, map, size, start, goa
 			G = g_s
 			break
 
-		for successor in traverse_nodes(map, size, state):
-			new_cost = explored[state] + 1
-			if successor not in explored or new_cost < explored[successor] :
-				explored[successor] = new_cost
-				h_successor = eucledian(goal, successor)
-				total_cost = new_cost + h_successor
-				if total_cost < G:
-					e_successor = compute_e(G, new_cost, h_successor)
-					front.put((e_successor, new_cost, successor))
-				parent_linked[successor] = state
+		expansions += 1
+		g_state = g[state]
+		edges = successors(map, state, parent[state], goal)
+		generated += len(edges)
+		for successor, cost in edges:
+			new_cost = g_state + cost
+			if stamp[successor] != generation:
+				stamp[successor] = generation
+			elif new_cost < g[successor]:
+				reopened += 1
+			else:
+				duplicates += 1
+				continue
+
+			g[successor] = new_cost
+			h_successor = heuristic(successor)
+			total_cost = new_cost + h_successor
+			if total_cost < G:
+				e_successor = compute_e(G, new_cost, h_successor)
+				front.put((e_successor, new_cost, successor))
+			parent[successor] = state
 
-	return parent_linked, explored, front, G, E
+		if metrics is not None and len(front) > open_peak:
+			open_peak = len(front)
+
+	budget.expansions = expansions
+	if metrics is not None:
+		metrics.update(expansions=expansions - first_expansion, generated=generated, duplicates=duplicates,
+			reopened=reopened, open_peak=open_peak)
+	return front, G, E
 
 ####
 
-def search(map,size):
+def search(map, successors=traverse_edges, heuristic=eucledian_heuristic, metrics=None, save_file="out.png", show=True):
     
     global path, start, end, path, expanded, frontier
     
     """
     This function is meant to use the global variables [start, end, path, expanded, frontier] to search through the
     provided map.
-    :param map: A '1-concept' PIL PixelAccess object to be searched. (basically a 2d boolean array)
+    :param map: An Occupancy_Map built from the '1-concept' map image (basically a 2d boolean array)
     """
 
     # O is unoccupied (white); 1 is occupied (black)
-    print ("pixel value at start point ", map[start[0], start[1]])
-    print ("pixel value at end point ", map[end[0], end[1]])
+    print ("pixel value at start point ", int(map.occupied[start[0], start[1]]))
+    print ("pixel value at end point ", int(map.occupied[end[0], end[1]]))
 
     #calling ANA method which calls improve_solution method based on status of open list
-    path, expanded, frontier, iterate = ANA(map, size, start, end)
+    path, expanded, frontier, iterate = ANA(map, start, end, successors, heuristic, metrics)
 
-    visualize_search("out.png") # see what your search has wrought (and maybe save your results)
+    visualize_search(save_file, show) # see what your search has wrought (and maybe save your results)
 
-def visualize_search(save_file="do_not_save.png"):
+def pixel_indices(pixels):
+    """
+    Flattens (x,y) pixels (e.g. the keys of the expanded dict or the path list) into the index arrays of an image
+    buffer, which is indexed [y, x].
+    """
+    points = np.fromiter((value for pixel in pixels for value in pixel), dtype=np.intp, count=2 * len(pixels))
+    points = points.reshape(-1, 2)
+    return points[:, 1], points[:, 0]
+
+def visualize_search(save_file="do_not_save.png", show=True):
     """
     :param save_file: (optional) filename to save image to (no filename given means no save file)
+    :param show: (optional) display the image, turn it off to only write save_file
     """
-    im = Image.open(difficulty).convert("RGB")
-    pixel_access = im.load()
-
-    # draw start and end pixels
-    pixel_access[start[0], start[1]] = NEON_GREEN
-    pixel_access[end[0], end[1]] = NEON_GREEN
-
-    # draw frontier pixels
-    for pixel in frontier.keys():
-        pixel_access[pixel[0], pixel[1]] = LIGHT_GRAY
-
-    # draw expanded pixels
-    for pixel in expanded.keys():
-        pixel_access[pixel[0], pixel[1]] = DARK_GRAY
-        
-    # draw path pixels
-    for pixel in path:
-        pixel_access[pixel[0], pixel[1]] = PURPLE
-        
-    # draw start and end pixels
-    pixel_access[start[0], start[1]] = NEON_GREEN
-    pixel_access[end[0], end[1]] = NEON_GREEN
+    pixels = np.array(Image.open(difficulty).convert("RGB"))
+
+    # draw frontier, expanded and path pixels, then the start and end pixels over them
+    # each layer is painted with a single fancy-indexed assignment into the image buffer
+    for layer, color in ((frontier, LIGHT_GRAY), (expanded, DARK_GRAY), (path, PURPLE), ((start, end), NEON_GREEN)):
+        pixels[pixel_indices(layer)] = color
 
     # display and (maybe) save results
-    im.show()
+    im = Image.fromarray(pixels)
+    if show:
+        im.show()
     if(save_file != "do_not_save.png"):
         im.save(save_file)
 
     im.close()
 
 
+def read_queries(filename):
+    """
+    Reads the start/goal pairs of a batch run, one "start_x start_y goal_x goal_y" query per line
+    (commas are accepted as separators, blank lines and lines starting with '#' are skipped).
+    :param filename: path of the query file
+    """
+    queries = []
+    with open(filename) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].replace(",", " ").split()
+            if not line:
+                continue
+            assert len(line) == 4, "Incorrect query on line " + str(line_number) + " of " + filename
+            x1, y1, x2, y2 = (int(value) for value in line)
+            queries.append(((x1, y1), (x2, y2)))
+
+    return queries
+
+def run_query(map, query_start, query_goal, time_limit=None, max_expansions=None, first_solution=False,
+              successors=traverse_edges, workspace=None, heuristic=eucledian_heuristic, field_cache=None, metrics=None):
+    """
+    Runs a single ANA* query without any rendering and returns its results as a dictionary.
+    :param time_limit: (optional) wall-clock seconds allowed for the query
+    :param max_expansions: (optional) number of expansions allowed for the query
+    :param first_solution: stop as soon as a first solution is found instead of improving it
+    :param successors: (optional) successor generator, e.g. jump_points_4 for Jump Point Search
+    :param workspace: (optional) Search_Workspace of the map to reuse instead of allocating a new one
+    :param heuristic: (optional) heuristic factory, e.g. Landmarks.heuristic for the ALT heuristic
+    :param field_cache: (optional) Distance_Field_Cache to answer the query from the distance field of its goal,
+                        ANA* is only run when the field is not cached and cannot be computed within time_limit
+    :param metrics: (optional) ANA_Metrics object recording the rounds of the ANA* search
+    """
+    result = {"start": list(query_start), "goal": list(query_goal)}
+    for name, point in (("start", query_start), ("goal", query_goal)):
+        if not (0 <= point[0] < map.width and 0 <= point[1] < map.height):
+            result["error"] = name + " is off the map"
+            return result
+        if map.occupied[point[0], point[1]]:
+            result["error"] = name + " is an obstacle"
+            return result
+
+    if field_cache is not None:
+        start_t = time.perf_counter()
+        path = field_cache.route(map, query_start, query_goal, time_limit)
+        if path is not None:
+            result["method"] = "field"
+            result["found"] = bool(path)
+            result["optimal"] = bool(path)
+            result["path_length"] = len(path)
+            result["cost"] = len(path) - 1 if path else None
+            result["expansions"] = 0
+            result["time"] = time.perf_counter() - start_t
+            return result
+
+    result["method"] = "ana"
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    search = ANA_Search(map, query_start, query_goal, successors, workspace, heuristic, metrics)
+    solution = None
+    solutions = 0
+    for solution in search.solutions(deadline, max_expansions):
+        solutions += 1
+        if first_solution:
+            break
+
+    result["found"] = solution is not None
+    result["optimal"] = search.done() and solution is not None
+    result["path_length"] = len(solution.path) if solution else 0
+    result["cost"] = solution.G if solution else None
+    result["sub_optimality"] = search.E if solution else None
+    result["solutions"] = solutions
+    result["expansions"] = search.expansions
+    result["time"] = search.elapsed
+
+    return result
+
+def batch(map, queries, out=sys.stdout, metrics=None, **limits):
+    """
+    Runs many start/goal queries on one (already loaded) map and streams one JSON line per query to out.
+    :param metrics: (optional) list to which a (labels, ANA_Metrics) pair is appended for every query
+                    (see export_metrics)
+    :param limits: time_limit, max_expansions, first_solution, successors, heuristic and field_cache, applied to
+                   every query (see run_query)
+    """
+    workspace = Search_Workspace(map)
+    for query, (query_start, query_goal) in enumerate(queries):
+        query_metrics = None
+        if metrics is not None:
+            query_metrics = ANA_Metrics()
+            metrics.append(({"query": query, "start": list(query_start), "goal": list(query_goal)}, query_metrics))
+
+        result = run_query(map, query_start, query_goal, workspace=workspace, metrics=query_metrics, **limits)
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+
+
 if __name__ == "__main__":
     # Throw Errors && Such
     # global difficulty, start, end
     #assert sys.version_info[0] == 2                                 # require python 2 (instead of python 3)
-    assert len(sys.argv) == 2, "Incorrect Number of arguments"      # require difficulty input
+    parser = argparse.ArgumentParser(description="Anytime Nonparametric A* (ANA*) search over a map image")
+    parser.add_argument("difficulty", help="map image to search (trivial.gif, medium.gif, hard.gif or very_hard.gif "
+                                           "unless --batch is given)")
+    parser.add_argument("--batch", metavar="QUERIES",
+                        help="run the start/goal pairs of this file headless and print one JSON line per query")
+    parser.add_argument("--output", metavar="FILE", help="(batch) write the JSON lines to this file instead of stdout")
+    parser.add_argument("--time-limit", type=float, help="(batch) wall-clock seconds allowed per query")
+    parser.add_argument("--max-expansions", type=int, help="(batch) number of expansions allowed per query")
+    parser.add_argument("--first-solution", action="store_true",
+                        help="(batch) stop every query at its first solution")
+    parser.add_argument("--successors", choices=sorted(SUCCESSORS), default="grid",
+                        help="successor generator: 4-connected grid moves (default) or Jump Point Search "
+                             "over 4-connected (jps) or 8-connected (jps8) moves")
+    parser.add_argument("--landmarks", type=int, default=0, metavar="COUNT",
+                        help="use the ALT heuristic with this many landmarks (stored with the map in --cache-dir)")
+    parser.add_argument("--field-cache", type=int, default=0, metavar="GOALS",
+                        help="(batch) answer queries from the distance fields of up to this many recent goals")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write the per-round ANA* metrics to this JSON (or .csv) file")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="prepare the map into this directory once and memory-map it on later runs")
+    parser.add_argument("--prepare", action="store_true", help="only prepare the map into --cache-dir and exit")
+    parser.add_argument("--image", default="out.png", metavar="FILE",
+                        help="save the rendered search to this file (default: %(default)s)")
+    parser.add_argument("--no-show", action="store_true", help="only save the rendered search, do not display it")
+    args = parser.parse_args()
 
     # Parse input arguments
     function_name = str(sys.argv[0])
-    difficulty = str(sys.argv[1])
+    difficulty = args.difficulty
+
+    if args.prepare:
+        assert args.cache_dir is not None, "--prepare requires --cache-dir"
+        print (prepare_map(difficulty, args.cache_dir))
+        if args.landmarks > 0:
+            print (prepare_landmarks(difficulty, args.cache_dir, args.landmarks))
+        sys.exit(0)
+
+    heuristic = eucledian_heuristic
+    if args.landmarks > 0:
+        assert args.successors != "jps8", "The ALT heuristic is only admissible for 4-connected moves"
+        heuristic = load_landmarks(difficulty, args.landmarks, args.cache_dir).heuristic
+
+    if args.batch is not None:
+        limits = dict(time_limit=args.time_limit, max_expansions=args.max_expansions,
+                      first_solution=args.first_solution, successors=SUCCESSORS[args.successors], heuristic=heuristic)
+        if args.field_cache > 0:
+            assert args.successors != "jps8", "Distance fields follow 4-connected moves"
+            limits["field_cache"] = Distance_Field_Cache(args.field_cache)
+        metrics = None if args.metrics is None else []
+        if args.output is None:
+            batch(load_map(difficulty, args.cache_dir), read_queries(args.batch), metrics=metrics, **limits)
+        else:
+            with open(args.output, "w") as out:
+                batch(load_map(difficulty, args.cache_dir), read_queries(args.batch), out, metrics, **limits)
+        if metrics is not None:
+            export_metrics(args.metrics, metrics)
+        sys.exit(0)
+
     print ("running " + function_name + " with " + difficulty + " difficulty.")
 
     # Hard code start and end positions of search for each difficulty level
-    if difficulty == "trivial.gif":
-        start = (8, 1)
-        end = (20, 1)
-    elif difficulty == "medium.gif":
-        start = (8, 201)
-        end = (110, 1)
-    elif difficulty == "hard.gif":
-        start = (10, 1)
-        end = (401, 220)
-    elif difficulty == "very_hard.gif":
-        start = (1, 324)
-        end = (580, 1)
-    else:
-        assert False, "Incorrect difficulty level provided"
+    assert difficulty in DIFFICULTIES, "Incorrect difficulty level provided"
+    start, end = DIFFICULTIES[difficulty]
 
     # Perform search on given image
-    im = Image.open(difficulty)
-    #Note how we also provide the image size as an input to the search method
+    #Note how the image is decoded once into an occupancy grid whose neighbor masks already know the image size
     #this is so that we can make sure not to try and explore out of the image in the traverse method
-    search(im.load(),im.size)
+    metrics = None if args.metrics is None else ANA_Metrics()
+    search(load_map(difficulty, args.cache_dir), SUCCESSORS[args.successors], heuristic, metrics, args.image,
+           not args.no_show)
+    if metrics is not None:
+        export_metrics(args.metrics, [({"start": list(start), "goal": list(end)}, metrics)])
@@ -0,0 +1,81 @@
+import sys
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from Eucledian_Path_Planner import SEARCHES, check_scenario, load_scenario, scenario_grid
+
+'''
+Headless batch runner of the grid planner: every scenario file (see load_scenario) of a directory is searched
+with each of the requested searches in a pool of worker processes, and the results are printed as a table
+(and optionally written to a JSON file) so that the same scenarios can be reproduced and benchmarked at scale.
+'''
+
+#Size in pixels of the grids of the batch, which only sets the node size of grids that are never drawn
+WIDTH = 1000
+
+#Searches one scenario file in a worker process, a scenario that cannot be loaded or searched gets an error
+def run_scenario(filename, search):
+	result = {"name": os.path.splitext(os.path.basename(filename))[0], "search": search}
+	try:
+		scenario = load_scenario(filename)
+	except (OSError, ValueError, KeyError, TypeError) as error:
+		result["error"] = "cannot load %s: %s" % (filename, error)
+		return result
+
+	result["rows"] = len(scenario.layout)
+	result["start"] = list(scenario.start)
+	result["goal"] = list(scenario.goal)
+	error = check_scenario(scenario)
+	if error is not None:
+		result["error"] = error
+		return result
+
+	grid, start, end = scenario_grid(scenario, WIDTH)
+	found = SEARCHES[search](grid, start, end)
+	result["found"] = found.found
+	result["cost"] = found.cost
+	result["path_length"] = len(found.path)
+	result["expanded"] = found.expanded
+	result["opened"] = found.opened
+	result["time"] = found.time
+	return result
+
+#Results come back in the order of the scenario files, each file with the searches in the order given
+def run_batch(filenames, searches, workers=None):
+	jobs = [(filename, search) for filename in filenames for search in searches]
+	with ProcessPoolExecutor(workers) as pool:
+		return list(pool.map(run_scenario, *zip(*jobs))) if jobs else []
+
+def print_table(results, out=sys.stdout):
+	out.write("%-24s %-13s %6s %6s %10s %10s %10s\n" % ("scenario", "search", "rows", "found", "cost", "expanded", "time (s)"))
+	for result in results:
+		if "error" in result:
+			out.write("%-24s %-13s %s\n" % (result["name"], result["search"], "ERROR " + result["error"]))
+			continue
+		cost = result["cost"]
+		out.write("%-24s %-13s %6d %6s %10s %10d %10.3f\n" % (
+			result["name"], result["search"], result["rows"], "yes" if result["found"] else "no",
+			"-" if cost is None else "%g" % cost, result["expanded"], result["time"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless batch runner of the grid planner over a directory of scenarios")
+    parser.add_argument("directory", help="directory of scenario (.json) files")
+    parser.add_argument("--searches", nargs="*", choices=sorted(SEARCHES), default=["astar"],
+                        help="searches to run on every scenario (default: astar)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--output", metavar="FILE", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    filenames = sorted(glob.glob(os.path.join(args.directory, "*.json")))
+    assert filenames, "No scenario files in " + args.directory
+
+    results = run_batch(filenames, args.searches, args.workers)
+    print_table(results)
+
+    if args.output is not None:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=1)
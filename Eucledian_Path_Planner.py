@@ -1,13 +1,28 @@
-import pygame
+import argparse
+import json
 import math
+import mmap
+import os
 import time
-from queue import PriorityQueue
+from collections import namedtuple
+from heapq import heappop, heappush
+import numpy as np
+
+#pygame is only needed by the interactive UI, the search itself runs headless (e.g. on servers without a display)
+try:
+	import pygame
+except ImportError:
+	pygame = None
+
+#pillow is only needed to read and write layouts as images
+try:
+	from PIL import Image
+except ImportError:
+	Image = None
 
 #Defining pygame window parameters
 width = 1000
 #note that having a square window allows us to build a square grid of the same number of rows and columns (square nodes)
-window = pygame.display.set_mode((width, width))
-pygame.display.set_caption("Path Finding Algorithm")
 
 #Defining RGB colors for showing "state" of each node
 RED = (255, 0, 0)
@@ -19,90 +34,116 @@ PURPLE = (120, 0, 120)
 ORANGE = (255, 165 ,0)
 GREY = (160,160,160)
 
+#The state of a node is stored as one of these codes in the state array of its grid, each drawn in its own color
+FREE, START, END, CLOSED, OPEN, BARRIER, PATH = range(7)
+COLORS = (WHITE, ORANGE, GREEN, RED, BLUE, BLACK, PURPLE)
+STATES = {color: state for state, color in enumerate(COLORS)}
+
+#(row, col) moves to the 8 neighbors of a node: DOWN, SW, SE, UP, NW, NE, RIGHT, LEFT
+NEIGHBOR_MOVES = ((1, 0), (1, -1), (1, 1), (-1, 0), (-1, -1), (-1, 1), (0, 1), (0, -1))
+
+#Generations of the score stamps wrap around before they overflow their array
+STAMP_LIMIT = 2**32 - 1
+
 #defining nodes using a class with attributes that allow the program to know node location (row,col/x,y) node state (color) etc.
+#A node is only a view of cell (row * rows + col) of its grid, which holds the actual state in its arrays,
+#so nodes are created on demand and two nodes of the same cell compare equal
 class Node:
-	def __init__(self, row, col, width, total_rows):
+	def __init__(self, grid, row, col):
+		self.grid = grid
 		self.row = row
 		self.col = col
-		self.x = row * width
-		self.y = col * width
-		self.color = WHITE
-		self.neighbors = []
-		self.width = width
-		self.total_rows = total_rows
+		self.cell = row * grid.rows + col
+
+	@property
+	def x(self):
+		return self.row * self.grid.gap
+
+	@property
+	def y(self):
+		return self.col * self.grid.gap
+
+	@property
+	def width(self):
+		return self.grid.gap
+
+	@property
+	def total_rows(self):
+		return self.grid.rows
+
+	@property
+	def color(self):
+		return COLORS[self.grid.cells[self.cell]]
+
+	@property
+	def neighbors(self):
+		grid = self.grid
+		return [grid.node(cell) for cell in grid.neighbors(self.cell)]
 
         #This function will be called everytime our algorithm calculates the heuristic function from current node
 	def get_pos(self):
 		return self.row, self.col
 
-        #The following methods check (using '==') whether or not a node is in a specific state based on its color
+        #The following methods check (using '==') whether or not a node is in a specific state based on its state code
 	def is_start(self):
-		return self.color == ORANGE
+		return self.grid.cells[self.cell] == START
 
 	def is_end(self):
-		return self.color == GREEN
+		return self.grid.cells[self.cell] == END
 
 	def is_closed(self):
-		return self.color == RED
+		return self.grid.cells[self.cell] == CLOSED
 
 	def is_open(self):
-		return self.color == BLUE
+		return self.grid.cells[self.cell] == OPEN
 
 	def is_barrier(self):
-		return self.color == BLACK
+		return self.grid.cells[self.cell] == BARRIER
+
+	#Border nodes are barriers that cannot be erased, so that workspace edges are not connected
+	def is_border(self):
+		return self.grid.is_border(self.cell)
+
+        #The following methods assign (using '=') a state to a node based on its state in the search or from the user input
+	#(every change is recorded so that only the nodes that changed get drawn again)
+	def set_color(self, color):
+		self.grid.set_state(self.cell, STATES[color])
 
-        #The following methods assign (using '=') a color to a node based on its state in the search or from the user input
 	def reset(self):
-		self.color = WHITE
+		self.grid.set_state(self.cell, FREE)
 
 	def make_start(self):
-		self.color = ORANGE
+		self.grid.set_state(self.cell, START)
 
 	def make_end(self):
-		self.color = GREEN
+		self.grid.set_state(self.cell, END)
 
 	def make_closed(self):
-		self.color = RED
+		self.grid.set_state(self.cell, CLOSED)
 
 	def make_open(self):
-		self.color = BLUE
+		self.grid.set_state(self.cell, OPEN)
 
 	def make_barrier(self):
-		self.color = BLACK
+		self.grid.set_state(self.cell, BARRIER)
 
 	def make_path(self):
-		self.color = PURPLE
-
-	def draw(self, window):
-		pygame.draw.rect(window, self.color, (self.x, self.y, self.width, self.width))
-
-        #The following method is used to assign neighbors for each node that is visited so long as it is not on the border
-	#Note that in order for the point robot to be able to move in "all directions" we have to make each node 8 connected 
-	def update_neighbors(self, grid):
-		self.neighbors = []
-		if self.row < self.total_rows - 1 and not grid[self.row + 1][self.col].is_barrier(): # DOWN (1)
-			self.neighbors.append(grid[self.row + 1][self.col])
+		self.grid.set_state(self.cell, PATH)
 
-		if self.row < self.total_rows - 1 and not grid[self.row + 1][self.col - 1].is_barrier(): # SW (2)
-			self.neighbors.append(grid[self.row + 1][self.col - 1])
+	#The pixels of the node in the window as the view shows it (None when it is out of the view)
+	def rect(self, view):
+		return view.rect(self.cell)
 
-		if self.row < self.total_rows - 1 and self.col < self.total_rows -1 and not grid[self.row + 1][self.col + 1].is_barrier(): # SE (3)
-			self.neighbors.append(grid[self.row + 1][self.col + 1])
+	def draw(self, window, view):
+		rect = self.rect(view)
+		if rect is not None:
+			pygame.draw.rect(window, self.color, rect)
 
-		if self.row > 0 and not grid[self.row - 1][self.col].is_barrier(): # UP (4)
-			self.neighbors.append(grid[self.row - 1][self.col])
+	def __eq__(self, other):
+		return isinstance(other, Node) and other.grid is self.grid and other.cell == self.cell
 
-		if self.row > 0  and not grid[self.row - 1][self.col - 1].is_barrier(): # NW (5)
-			self.neighbors.append(grid[self.row - 1][self.col - 1])
-
-		if self.row > 0 and self.col < self.total_rows -1 and not grid[self.row - 1][self.col + 1].is_barrier(): # NE (6)
-			self.neighbors.append(grid[self.row - 1][self.col + 1])
-
-		if self.col < self.total_rows - 1 and not grid[self.row][self.col + 1].is_barrier(): # RIGHT (7)
-			self.neighbors.append(grid[self.row][self.col + 1])
-
-		if self.col > 0 and not grid[self.row][self.col - 1].is_barrier(): # LEFT (8)
-			self.neighbors.append(grid[self.row][self.col - 1])
+	def __hash__(self):
+		return self.cell
 
 	def __lt__(self, other):
 		return False
@@ -113,15 +154,74 @@ def h(p1, p2):
 	x2, y2 = p2
 	return math.sqrt((x1 - x2)**2 + (y1 - y2)**2) #Euclidean Distance
 
-#Once the end node is reached, this function is called to trace back (and paint) the (shortest) path that was taken from start to end
-def reconstruct_path(came_from, current, draw):
-	while current in came_from:
-		current = came_from[current]
-		current.make_path()
-		draw()
-
+#Once the end node is reached, this function is called to trace back the (shortest) path that was taken from start to end
+#following the parent array of the grid, it returns the cells of the path
+def reconstruct_path(parent, current):
+	path = [current]
+	while parent[current] != -1:
+		current = parent[current]
+		path.append(current)
+	path.reverse()
+	return path
+
+#What a search hands back: the path as a list of nodes from start to end (empty when no path was found),
+#its cost (the g-score of the end node) and statistics on the work that was done
+Search_Result = namedtuple("Search_Result", ["found", "path", "cost", "expanded", "opened", "time"])
+
+#The open set of the searches: a heap of cells with lazy deletion, in which the priority of a cell already in the
+#heap can be lowered (decrease-key). As in the open list of the ANA* search the heap holds (priority, cell) entries
+#and the entries dictionary gives the live entry of every cell; heap positions are not tracked, so decrease-key
+#pushes a new entry and the one it supersedes is dropped when it reaches the top. Cells still come out in the
+#order of their current priority, once each, while all the sifting stays in the C heapq functions.
+#(unlike queue.PriorityQueue it takes no locks, the searches never share it between threads)
+class Indexed_Heap:
+	def __init__(self):
+		self.heap = []
+		self.entries = {}
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __contains__(self, cell):
+		return cell in self.entries
+
+	def priority(self, cell):
+		return self.entries[cell][0]
+
+	def push(self, cell, priority):
+		entry = (priority, cell)
+		self.entries[cell] = entry
+		heappush(self.heap, entry)
+
+	def decrease_key(self, cell, priority):
+		assert priority <= self.entries[cell][0], "The priority of a cell in the heap can only decrease"
+		self.push(cell, priority)
+
+	#Drops the superseded entries from the top of the heap
+	def skip(self):
+		heap = self.heap
+		entries = self.entries
+		while entries.get(heap[0][1]) is not heap[0]:
+			heappop(heap)
+
+	def pop(self):
+		self.skip()
+		priority, cell = heappop(self.heap)
+		del self.entries[cell]
+		return cell, priority
+
+#Seconds between two progress callbacks of the search, so that an observer (e.g. the pygame UI) is not
+#run on every single expansion
+PROGRESS_INTERVAL = 1 / 30
+
+#The A* search itself, free of any rendering so it can run without a window
+#progress (optional) is called with the cells opened and closed since its last call, at most once every interval
+#seconds and once more when the search ends; returning False from it cancels the search
+#Nothing is set up over the whole grid: scores are only created for the nodes the search touches and neighbors
+#are generated from the barriers as nodes are expanded, so a short query stays cheap on a big grid
+def astar(grid, start, end, progress=None, interval=PROGRESS_INTERVAL):
+	assert not start.is_border() and not end.is_border(), "The start and end nodes cannot be on the border"
 
-def algorithm(draw, grid, start, end):
         #Start timer as soon as search algorithm is called
 	T1 = time.perf_counter()
 
@@ -130,203 +230,903 @@ def algorithm(draw, grid, start, end):
 	count = 0
 
         #Our open set consists of all nodes that we visited but have not yet explored the neighbors of
-	#PriorityQueue allows us store nodes by order of f score (least score on top)
+	#Indexed_Heap allows us store nodes by order of f score (least score on top)
 	#This way the "next" node to explore is always the one with the lowest f score
-	open_set = PriorityQueue()
-	#Each entry to the open set consists of the f score, the count, and the node location (row,col)
-	open_set.put((0, count, start))
-
-        #The came_from dictionary structure is used to keep track of what was the previous node that leads
+	open_set = Indexed_Heap()
+	#Each node in the open set has the f score and the count as its priority, the node location is its cell
+	start_cell = start.cell
+	end_cell = end.cell
+	end_pos = end.get_pos()
+	open_set.push(start_cell, (0, count))
+
+        #The parent array of the grid is used to keep track of what was the previous node that leads
 	#to each current node which we will need for constructing the path once the end is reached
-	came_from = {}
+	parent = grid.parent
+	parent[start_cell] = -1
 
-	#Assigning infinite values to unvisited nodes so that we only search nodes with defined scores first
+	#Unvisited nodes count as having infinite scores so that we only search nodes with defined scores first
 	#(any defined score would be less than infinity so we always explore visited nodes first)
-	#A node's scores become defined once we visit it
-	g_score = {node: float("inf") for row in grid for node in row}
-	f_score = {node: float("inf") for row in grid for node in row}
-	f_score[start] = h(start.get_pos(), end.get_pos())
-	g_score[start] = 0
-
-        #open_set_track allows us to view the open set list since we are not able to "view" the PriorityQueue
-	open_set_track = {start}
+	#A node's scores become defined once we visit it, which is when its stamp is set to the generation of this search
+	generation = grid.new_generation()
+	stamp = grid.stamp
+	g_score = grid.g
+	g_score[start_cell] = 0
+	stamp[start_cell] = generation
+
+	rows = grid.rows
+	cells = grid.cells
+	steps = grid.steps
+
+	#Nodes opened and closed since the last progress callback (only collected when there is an observer, so that a
+	#headless search does not keep every cell it touched)
+	track = progress is not None
+	opened = []
+	closed = []
+	next_progress = T1 + interval
+	expanded = 0
+
+	path = []
+	cancelled = False
 
         #The algorithm runs as long as there are nodes in the open set i.e. as long as there are nodes to explore
-	while not open_set.empty():
-		for event in pygame.event.get():
-			if event.type == pygame.QUIT:
-				pygame.quit()
-
-                #Current node is always the one with the smallest f score in the PriorityQueue
-		current = open_set.get()[2]
-		#We have to manually remove each node that we finished exploring from the open set tracker
-		open_set_track.remove(current)
+	while open_set:
+                #Current node is always the one with the smallest f score in the open set
+		current = open_set.pop()[0]
 
                 #Terminate if current and end node are the same i.e. goal reached
-		if current == end:
-			reconstruct_path(came_from, end, draw)
-			end.make_end()
-
-                        #Stop timer as soon as end is reached
-			T2 = time.perf_counter()
-			tictoc=T2-T1
-			print(tictoc)
-
-                        #printing g-score of end node which is the minimum total cost to get to the end node
-			print(g_score[current])
-			return True
+		if current == end_cell:
+			path = [grid.node(cell) for cell in reconstruct_path(parent, end_cell)]
+			break
 
+		expanded += 1
                 #For traversing from one node to its neighbors, we assume all edge/path weights to be 1
 		#Thus whenever we go from the current node to one of its neighbors, we add 1 to the g score
-		for neighbor in current.neighbors:
-			temp_g_score = g_score[current] + 1
+		#(expanded nodes are never on the border, which is all barriers, so their 8 neighbors are inside the grid)
+		temp_g_score = g_score[current] + 1
+		for step in steps:
+			neighbor = current + step
+			if cells[neighbor] == BARRIER:
+				continue
 
                         #If the original g-score of the neighbor is larger than the g-score from the current node
 			#this means that we just found a shorter way to get to that neighbor and so we overwrite the g score
-			if temp_g_score < g_score[neighbor]:
-				came_from[neighbor] = current
+			if stamp[neighbor] != generation or temp_g_score < g_score[neighbor]:
+				stamp[neighbor] = generation
+				parent[neighbor] = current
 				g_score[neighbor] = temp_g_score
-				f_score[neighbor] = temp_g_score + h(neighbor.get_pos(), end.get_pos())
-                                #Add neighbor to open set if it was not already there
-				if neighbor not in open_set_track:
+				f_score = temp_g_score + h(divmod(neighbor, rows), end_pos)
+                                #Add neighbor to open set if it was not already there, otherwise move it up to its new f score
+				if neighbor in open_set:
+					open_set.decrease_key(neighbor, (f_score, open_set.priority(neighbor)[1]))
+				else:
 					count += 1
-					open_set.put((f_score[neighbor], count, neighbor))
-					open_set_track.add(neighbor)
-					neighbor.make_open()
+					open_set.push(neighbor, (f_score, count))
+					if track:
+						opened.append(neighbor)
+
+                #Once the for loop is done going through all neighbors of a given node, the node is closed
+		if track:
+			closed.append(current)
+
+			if time.perf_counter() >= next_progress:
+				if progress(opened, closed) is False:
+					cancelled = True
+					break
+				opened = []
+				closed = []
+				next_progress = time.perf_counter() + interval
+
+	#Let the observer catch up with whatever happened since its last call
+	if track and not cancelled:
+		progress(opened, closed)
+
+        #Stop timer as soon as end is reached (or the open set ran out, when no path is found)
+	T2 = time.perf_counter()
+
+        #The g-score of end node is the minimum total cost to get to the end node
+	cost = g_score[end_cell] if path else None
+	return Search_Result(bool(path), path, cost, expanded, count, T2 - T1)
+
+#The number of moves between two cells when every move (diagonal ones included) costs 1
+#Unlike h() it never overestimates, which the searches that need a consistent heuristic rely on
+def chebyshev(a, b, rows):
+	a_row, a_col = divmod(a, rows)
+	b_row, b_col = divmod(b, rows)
+	return max(abs(a_row - b_row), abs(a_col - b_col))
+
+#Bidirectional A*: a forward search from the start node and a backward search from the end node take turns
+#(the one whose open set has the smaller top entry expands next) until they meet
+#Both searches use the average of the Chebyshev distances to the two ends as their potential, forward
+#p(v) = (chebyshev(v, end) - chebyshev(start, v)) / 2 and backward -p(v), so that their keys are g + p and g - p.
+#Those potentials are consistent (h() is not) and make the two searches a bidirectional Dijkstra search on
+#reduced costs, for which the classic meet-in-the-middle stop is correct: best is the cost of the best path found
+#through a node reached by both searches and the search stops as soon as the top keys of the two open sets add up
+#to best, since no path that is still unknown can be shorter. The path found is a shortest path.
+#Takes the same arguments as astar() and returns its results the same way
+def bidirectional_astar(grid, start, end, progress=None, interval=PROGRESS_INTERVAL):
+	assert not start.is_border() and not end.is_border(), "The start and end nodes cannot be on the border"
+	T1 = time.perf_counter()
 
-		draw()
+	rows = grid.rows
+	cells = grid.cells
+	steps = grid.steps
+	start_cell = start.cell
+	end_cell = end.cell
+
+	#Everything is kept per direction, indexed 0 for the forward search and 1 for the backward one
+	#Scores are dictionaries so that they only exist for the nodes the search touches
+	#Open set entries are (key, -g score, count, cell): ties go to the deepest node, then to the oldest one
+	#An entry whose g score is not the current one of its cell was superseded by a better entry and is skipped
+	def potential(cell):
+		return (chebyshev(cell, end_cell, rows) - chebyshev(start_cell, cell, rows)) / 2
+	signs = (1, -1)
+	g_scores = ({start_cell: 0}, {end_cell: 0})
+	parents = ({start_cell: -1}, {end_cell: -1})
+	closed_sets = (set(), set())
+	open_sets = ([(potential(start_cell), 0, 0, start_cell)], [(-potential(end_cell), 0, 1, end_cell)])
+	count = 1
+
+	best = 0 if start_cell == end_cell else math.inf
+	meeting = start_cell
+
+	#Nodes opened and closed since the last progress callback, only collected when there is an observer
+	track = progress is not None
+	opened = []
+	closed = []
+	next_progress = T1 + interval
+	expanded = 0
+	cancelled = False
+
+	while best > 0:
+		for side in (0, 1):
+			open_set = open_sets[side]
+			while open_set and (open_set[0][3] in closed_sets[side] or -open_set[0][1] != g_scores[side][open_set[0][3]]):
+				heappop(open_set)
+		if not open_sets[0] or not open_sets[1] or open_sets[0][0][0] + open_sets[1][0][0] >= best:
+			break
+
+		side = 0 if open_sets[0][0] <= open_sets[1][0] else 1
+		open_set = open_sets[side]
+		g_score = g_scores[side]
+		other_g_score = g_scores[1 - side]
+		parent = parents[side]
+		closed_set = closed_sets[side]
+		sign = signs[side]
+
+		key, negative_g_score, order, current = heappop(open_set)
+		closed_set.add(current)
+		expanded += 1
+
+		#(expanded nodes are never on the border, which is all barriers, so their 8 neighbors are inside the grid)
+		temp_g_score = 1 - negative_g_score
+		for step in steps:
+			neighbor = current + step
+			if cells[neighbor] == BARRIER or neighbor in closed_set:
+				continue
+			if temp_g_score < g_score.get(neighbor, math.inf):
+				g_score[neighbor] = temp_g_score
+				parent[neighbor] = current
+				count += 1
+				heappush(open_set, (temp_g_score + sign * potential(neighbor), -temp_g_score, count, neighbor))
+				if track:
+					opened.append(neighbor)
+
+				#The searches met: a path goes through this neighbor
+				if neighbor in other_g_score and temp_g_score + other_g_score[neighbor] < best:
+					best = temp_g_score + other_g_score[neighbor]
+					meeting = neighbor
+
+		if track:
+			closed.append(current)
+
+			if time.perf_counter() >= next_progress:
+				if progress(opened, closed) is False:
+					cancelled = True
+					break
+				opened = []
+				closed = []
+				next_progress = time.perf_counter() + interval
+
+	if track and not cancelled:
+		progress(opened, closed)
+
+	path = []
+	if best < math.inf and not cancelled:
+		#The forward half from the start node to the meeting node, then the backward half on to the end node
+		path = reconstruct_path(parents[0], meeting) + reconstruct_path(parents[1], meeting)[-2::-1]
+		path = [grid.node(cell) for cell in path]
+
+	T2 = time.perf_counter()
+	return Search_Result(bool(path), path, best if path else None, expanded, count - 1, T2 - T1)
+
+#The pygame front end of astar() (or of another search taking the same arguments, like bidirectional_astar()):
+#paints the search progress as it goes (at most once per PROGRESS_INTERVAL) and then the path that was found
+def algorithm(draw, grid, start, end, search=astar):
+	def progress(opened, closed):
+		for cell in opened:
+			if cell != start.cell and cell != end.cell:
+				grid.set_state(cell, OPEN)
+		for cell in closed:
+			#If the current node exits the for loop and is not the start (or end) node, then we make it closed
+			if cell != start.cell and cell != end.cell:
+				grid.set_state(cell, CLOSED)
 
-                #Once the for loop is done going through all neighbors of a given node,
-		#If the current node exits the for loop and is not the start node, then we make it closed
-		if current != start:
-			current.make_closed()
+		for event in pygame.event.get():
+			if event.type == pygame.QUIT:
+				#Stop the search and hand the event back to main() so that it exits as well
+				pygame.event.post(event)
+				return False
 
-        #for when no path is found and all nodes in the open set have been searched
-        
-	return False
-	
-#This method builds the 2D array (grid) that is populated with rowsXrows nodes of size gap
-def make_grid(rows, width):
-	grid = []
-        #The total width integer division by the total rows gives us us the size of equal gaps from border to border
-	gap = width // rows
-	for i in range(rows):
-		grid.append([])
-		for j in range(rows):
-			node = Node(i, j, gap, rows)
-			grid[i].append(node)
-
-	return grid
-
-#This method uses the same gap measurement to "skip" over the white node body and draw grid lines at the node border
-def draw_grid(window, rows, width):
-	gap = width // rows
-	for i in range(rows):
-		pygame.draw.line(window, GREY, (0, i * gap), (width, i * gap)) #horizontal lines
-		for j in range(rows):
-			pygame.draw.line(window, GREY, (j * gap, 0), (j * gap, width)) #vertical lines
-
-#This method is to paint the entire window (window) white and all the border nodes black (barriers)
-def draw(window, grid, rows, width):
-	window.fill(WHITE)
+		draw()
+		return True
 
-	for row in grid:
-		for node in row:
-			node.draw(window)
-
-                        #Drawing barriers at boundary so that workspace edges are not connected
-			#Note that including this in the draw() method ensures that even if the user tries to erase
-			#a barrier at the border, the algorithm will simply draw a barrier over it again
-			if node.col == 0:
-				node.make_barrier()
-			if node.col == rows-1:
-				node.make_barrier()
-			if node.row == 0:
-				node.make_barrier()
-			if node.row == rows-1:
-				node.make_barrier()
-
-                        #Defining start and end nodes at opposite corners
-			if node.col == 1 and node.row == 1:
-				node.make_start()
-			if node.col == rows-2 and node.row == rows-2:
-				node.make_end()
-        #Calling draw_grid function after grid array has been defined and populated with all open nodes and border (barrier) nodes
-	draw_grid(window, rows, width)
-	pygame.display.update()
+	result = search(grid, start, end, progress)
+	if not result.found:
+        #for when no path is found and all nodes in the open set have been searched
+		return False
 
-#This method converts all continuous x,y values within a node to a single row,col pair of that node
-def get_clicked_pos(pos, rows, width):
-	gap = width // rows
-	y, x = pos
+	for node in result.path[1:-1]:
+		node.make_path()
+	end.make_end()
+	draw()
 
-        #For example, if the gap is 20 (20x20 size box of a node) then if the mouse cursor is at (10,10) the integer
-	#division causes row and col to be 0 which means that we are at the top left node.
-	row = y // gap
-	col = x // gap
+	print(result.time)
+	print(result.cost)
+	return True
+	
+#Scores that are infinite until they are set
+class Scores(dict):
+	def __missing__(self, cell):
+		return math.inf
+
+#Incremental replanning with D* Lite: the search runs backward from the end node and keeps its g and rhs values
+#(the g-score of a node and the one-step lookahead on it) between plans, so that after barriers are toggled only
+#the nodes whose distance to the end node changed are searched again. The start node may move in between plans,
+#as a robot does while it follows the path.
+#The heuristic is the Chebyshev distance, which (unlike h()) is consistent for 8 connected moves of cost 1 as D* Lite
+#requires, so the paths it plans are shortest paths.
+class DStar_Lite:
+	def __init__(self, grid, start, end):
+		assert not start.is_border() and not end.is_border(), "The start and end nodes cannot be on the border"
+		self.grid = grid
+		self.rows = grid.rows
+		self.start = start.cell
+		self.goal = end.cell
+		#where the start node was when the keys in the queue were computed, and the km offset that makes up for its moves
+		self.last = self.start
+		self.km = 0
+
+		#Only the nodes the planner touched have scores, so that it stays cheap on a big grid
+		self.g = Scores()
+		self.rhs = Scores()
+
+		#Heap of [k1, k2, cell] entries, the keys dictionary gives the live key of every cell in the queue
+		#(entries whose key is not the live one are skipped when they come up)
+		self.queue = []
+		self.keys = {}
+		self.expanded = 0
+		self.opened = 0
+
+		self.rhs[self.goal] = 0
+		self.push(self.goal)
+
+	def heuristic(self, a, b):
+		return chebyshev(a, b, self.rows)
+
+	def key(self, cell):
+		score = min(self.g[cell], self.rhs[cell])
+		return (score + self.heuristic(self.start, cell) + self.km, score)
+
+	def push(self, cell):
+		key = self.key(cell)
+		self.keys[cell] = key
+		heappush(self.queue, (key, cell))
+		self.opened += 1
+
+	#The smallest live entry of the queue (None when it is empty)
+	def top(self):
+		queue = self.queue
+		while queue and self.keys.get(queue[0][1]) != queue[0][0]:
+			heappop(queue)
+		return queue[0] if queue else None
+
+	#Every neighbor inside the grid, barriers included (edges to and from barriers cost infinity)
+	def around(self, cell):
+		row, col = divmod(cell, self.rows)
+		rows = self.rows
+		return [(row + move_row) * rows + col + move_col for move_row, move_col in NEIGHBOR_MOVES
+			if 0 <= row + move_row < rows and 0 <= col + move_col < rows]
+
+	def update_vertex(self, cell):
+		cells = self.grid.cells
+		if cell != self.goal:
+			rhs = math.inf
+			if cells[cell] != BARRIER:
+				g = self.g
+				for neighbor in self.around(cell):
+					if cells[neighbor] != BARRIER and g[neighbor] + 1 < rhs:
+						rhs = g[neighbor] + 1
+			self.rhs[cell] = rhs
+
+		self.keys.pop(cell, None)
+		if self.g[cell] != self.rhs[cell]:
+			self.push(cell)
+
+	def compute_shortest_path(self):
+		g = self.g
+		rhs = self.rhs
+		while True:
+			top = self.top()
+			if top is None or (top[0] >= self.key(self.start) and rhs[self.start] == g[self.start]):
+				return
+			old_key, cell = top
+			new_key = self.key(cell)
+			if old_key < new_key:
+				self.keys[cell] = new_key
+				heappush(self.queue, (new_key, cell))
+				continue
+
+			heappop(self.queue)
+			del self.keys[cell]
+			self.expanded += 1
+			if g[cell] > rhs[cell]:
+				g[cell] = rhs[cell]
+				for neighbor in self.around(cell):
+					self.update_vertex(neighbor)
+			else:
+				g[cell] = math.inf
+				self.update_vertex(cell)
+				for neighbor in self.around(cell):
+					self.update_vertex(neighbor)
+
+	#Tells the planner about cells whose barrier state was toggled since the last plan
+	def update_cells(self, cells):
+		#the keys of the queue are only lower bounds once the start node moved, km keeps them comparable
+		self.km += self.heuristic(self.last, self.start)
+		self.last = self.start
+		for cell in set(cells):
+			self.update_vertex(cell)
+			for neighbor in self.around(cell):
+				self.update_vertex(neighbor)
+
+	def move_start(self, node):
+		self.start = node.cell
+
+	#Repairs the previous plan and returns it as a Search_Result (expanded and opened count the work of this plan)
+	def plan(self):
+		T1 = time.perf_counter()
+		self.expanded = 0
+		self.opened = 0
+		self.compute_shortest_path()
+
+		path = []
+		cost = self.g[self.start]
+		if cost < math.inf:
+			#Follow the g values down to the end node
+			cells = self.grid.cells
+			g = self.g
+			current = self.start
+			path.append(current)
+			while current != self.goal and len(path) <= cost:
+				current = min((neighbor for neighbor in self.around(current) if cells[neighbor] != BARRIER),
+					key=lambda neighbor: g[neighbor])
+				path.append(current)
+
+		T2 = time.perf_counter()
+		return Search_Result(bool(path), [self.grid.node(cell) for cell in path], cost if path else None,
+			self.expanded, self.opened, T2 - T1)
+
+#A single plan of the incremental planner, to run it like the other searches
+def dstar_lite(grid, start, end):
+	return DStar_Lite(grid, start, end).plan()
+
+#The searches by name (for the command line and the batch runner)
+SEARCHES = {"astar": astar, "bidirectional": bidirectional_astar, "dstar": dstar_lite}
+
+#Sets every node that a previous search painted (open, closed or path) back to free
+def clear_search(grid):
+	for cell in np.flatnonzero(np.isin(grid.state.reshape(-1), (OPEN, CLOSED, PATH))).tolist():
+		grid.set_state(cell, FREE)
+
+#Paints a plan of the incremental planner over the previous one (given as the nodes of its path)
+def paint_plan(grid, result, previous):
+	for node in previous:
+		if node.grid.cells[node.cell] == PATH:
+			node.reset()
+	for node in result.path[1:-1]:
+		node.make_path()
+	print(result.time)
+	print(result.cost)
+	return result.path
+
+#Zeroed typed arrays that only take memory where they are written
+#An anonymous memory map is backed by the operating system page by page (4 KB) on first write; huge pages are
+#turned off for it where that is possible, since a single write would otherwise bring in 2 MB at once
+def lazy_array(size, dtype):
+	dtype = np.dtype(dtype)
+	buffer = mmap.mmap(-1, max(1, size * dtype.itemsize))
+	if hasattr(buffer, "madvise") and hasattr(mmap, "MADV_NOHUGEPAGE"):
+		buffer.madvise(mmap.MADV_NOHUGEPAGE)
+	return np.frombuffer(buffer, dtype=dtype, count=size)
+
+#The 2D array (grid) of nodes: their state codes, g-scores, parents and score stamps are kept in flat typed arrays
+#indexed by cell (row * rows + col), so a grid costs 17 bytes per node and state checks are integer compares
+#grid[row][col] still gives the Node of a cell, as a view of these arrays
+#The search arrays (16 of those bytes) are lazy_array()s: a big grid only takes memory for them in the pages
+#around the cells that searches actually touched, so a 5000x5000 grid starts out at about 25 MB (its states)
+#and a short query on it stays cheap, while every access is still a plain array index
+class Grid:
+	def __init__(self, rows, width):
+		self.rows = rows
+        #The total width integer division by the total rows gives us us the size of equal gaps from border to border
+		#(the size of a node at the zoom that fits the grid in the window, which x, y and width of a node are based on;
+		#see View for where nodes are actually drawn)
+		self.gap = max(1, width // rows)
+
+		self.state = np.zeros((rows, rows), dtype=np.uint8)
+		#Barriers at the boundary so that workspace edges are not connected
+		self.state[[0, -1], :] = BARRIER
+		self.state[:, [0, -1]] = BARRIER
+		#The g-score and parent of a cell are only meaningful when its stamp is the generation of the current search
+		self.g_scores = lazy_array(rows * rows, np.float64)
+		self.parents = lazy_array(rows * rows, np.int32)
+		self.stamps = lazy_array(rows * rows, np.uint32)
+		self.generation = 0
+
+		#Flat views of the arrays for fast access to single cells from Python
+		self.cells = memoryview(self.state.reshape(-1))
+		self.g = memoryview(self.g_scores)
+		self.parent = memoryview(self.parents)
+		self.stamp = memoryview(self.stamps)
+		#Offsets from a cell to its 8 neighbors (in NEIGHBOR_MOVES order)
+		self.steps = tuple(row * rows + col for row, col in NEIGHBOR_MOVES)
+
+		#Cells whose state changed since the last frame
+		self.changed = []
+
+	def __len__(self):
+		return self.rows
+
+	def __getitem__(self, row):
+		if not -self.rows <= row < self.rows:
+			raise IndexError(row)
+		return Grid_Row(self, row % self.rows)
+
+	def __iter__(self):
+		for row in range(self.rows):
+			yield Grid_Row(self, row)
+
+	def node(self, cell):
+		row, col = divmod(cell, self.rows)
+		return Node(self, row, col)
+
+	def is_border(self, cell):
+		row, col = divmod(cell, self.rows)
+		return row == 0 or col == 0 or row == self.rows - 1 or col == self.rows - 1
+
+	#Border nodes always stay barriers
+	def set_state(self, cell, state):
+		if self.cells[cell] != state and not self.is_border(cell):
+			self.cells[cell] = state
+			self.changed.append(cell)
+
+	#Starts a new search: every score from the previous ones becomes undefined at once
+	def new_generation(self):
+		if self.generation >= STAMP_LIMIT:
+			self.stamps.fill(0)
+			self.generation = 0
+		self.generation += 1
+		return self.generation
+
+	#The cells a node can move to: the neighbors inside the grid that are not barriers
+	#Note that in order for the point robot to be able to move in "all directions" we have to make each node 8 connected 
+	def neighbors(self, cell):
+		row, col = divmod(cell, self.rows)
+		neighbors = []
+		for move_row, move_col in NEIGHBOR_MOVES:
+			if 0 <= row + move_row < self.rows and 0 <= col + move_col < self.rows:
+				neighbor = (row + move_row) * self.rows + col + move_col
+				if self.cells[neighbor] != BARRIER:
+					neighbors.append(neighbor)
+		return neighbors
+
+#A row of a Grid, so that grid[row][col] keeps working
+class Grid_Row:
+	def __init__(self, grid, row):
+		self.grid = grid
+		self.row = row
 
-	return row, col
+	def __len__(self):
+		return self.grid.rows
 
+	def __getitem__(self, col):
+		if not -self.grid.rows <= col < self.grid.rows:
+			raise IndexError(col)
+		return Node(self.grid, self.row, col % self.grid.rows)
 
-def main(window, width):
-	rows = 50
-	grid = make_grid(rows, width)
+	def __iter__(self):
+		for col in range(self.grid.rows):
+			yield Node(self.grid, self.row, col)
 
-        #Defining start node in top left corner
-	start = grid[1][1]
+#This method builds the 2D array (grid) that is populated with rowsXrows nodes of size gap
+def make_grid(rows, width):
+	return Grid(rows, width)
+
+#A planning problem: the barrier layout of a grid, a boolean array indexed [row][col] that is True for barriers,
+#and the (row, col) of its start and goal nodes
+Scenario = namedtuple("Scenario", ["name", "layout", "start", "goal"])
+
+#Pixels darker than this are barriers in layout images
+BARRIER_THRESHOLD = 128
+
+#Layouts are read from .npy files (non-zero cells are barriers) or from images in which dark pixels are barriers,
+#pixel (x, y) being node (row, col) as in the window. Grids are square so a layout that is not gets padded
+#with barriers (the border of a layout always ends up a barrier as well)
+def load_layout(filename):
+	if filename.lower().endswith(".npy"):
+		layout = np.load(filename) != 0
+	else:
+		assert Image is not None, "Image layouts need pillow, use a .npy layout without it"
+		with Image.open(filename) as im:
+			#NumPy arrays of images are indexed [y, x] so we transpose to get [row][col]
+			layout = (np.asarray(im.convert("L")) < BARRIER_THRESHOLD).T
+	if layout.ndim != 2:
+		raise ValueError("%s is not a 2D layout" % filename)
+
+	rows = max(layout.shape)
+	if layout.shape != (rows, rows):
+		padded = np.ones((rows, rows), dtype=bool)
+		padded[:layout.shape[0], :layout.shape[1]] = layout
+		layout = padded
+	return layout
+
+#Writes the barriers of the grid as a .npy file or, for any other extension, as a black and white image
+def save_layout(grid, filename):
+	layout = grid.state == BARRIER
+	if filename.lower().endswith(".npy"):
+		np.save(filename, layout)
+	else:
+		assert Image is not None, "Image layouts need pillow, use a .npy layout without it"
+		Image.fromarray(np.where(layout.T, 0, 255).astype(np.uint8)).save(filename)
+
+#The start and goal of a layout without a scenario file are its top left and bottom right corners
+def layout_scenario(filename):
+	layout = load_layout(filename)
+	rows = len(layout)
+	return Scenario(os.path.splitext(os.path.basename(filename))[0], layout, (1, 1), (rows - 2, rows - 2))
+
+#Scenario files are JSON objects {"map": layout file, "start": [row, col], "goal": [row, col]}, the layout file
+#being relative to the scenario file
+def load_scenario(filename):
+	with open(filename) as f:
+		data = json.load(f)
+	layout = load_layout(os.path.join(os.path.dirname(filename), data["map"]))
+	return Scenario(os.path.splitext(os.path.basename(filename))[0], layout, tuple(data["start"]), tuple(data["goal"]))
+
+#Saves the barriers, start and end node of the grid as a scenario file and its layout file (by default a .npy
+#file named after the scenario file)
+def save_scenario(filename, grid, start, end, layout_file=None):
+	if layout_file is None:
+		layout_file = os.path.splitext(filename)[0] + ".npy"
+	save_layout(grid, layout_file)
+	data = {
+		"map": os.path.relpath(layout_file, os.path.dirname(os.path.abspath(filename))),
+		"start": list(start.get_pos()),
+		"goal": list(end.get_pos()),
+	}
+	with open(filename, "w") as out:
+		json.dump(data, out, indent=1)
+
+#What is wrong with the scenario (as a printable string), None when it can be searched
+def check_scenario(scenario):
+	rows = len(scenario.layout)
+	if rows < 4:
+		return "the grid needs at least 4 rows"
+	for name, (row, col) in (("start", scenario.start), ("goal", scenario.goal)):
+		if not (0 < row < rows - 1 and 0 < col < rows - 1):
+			return name + " is not inside the border"
+		if scenario.layout[row][col]:
+			return name + " is a barrier"
+	if tuple(scenario.start) == tuple(scenario.goal):
+		return "start and goal are the same node"
+	return None
+
+#Builds the grid of a scenario, returning it with its start and end nodes
+def scenario_grid(scenario, width):
+	layout = scenario.layout
+	grid = make_grid(len(layout), width)
+	#The layout is copied into the state array directly: a new grid is drawn in full anyway
+	grid.state[1:-1, 1:-1][layout[1:-1, 1:-1]] = BARRIER
+
+	start = grid[scenario.start[0]][scenario.start[1]]
 	start.make_start()
-
-	#Defining end node in bottom right corner
-	end = grid[rows-2][rows-2]
+	end = grid[scenario.goal[0]][scenario.goal[1]]
 	end.make_end()
+	return grid, start, end
+
+#The scenario of an empty grid, with the start node in the top left corner and the end node in the bottom right one
+def empty_scenario(rows):
+	return Scenario("empty", np.zeros((rows, rows), dtype=bool), (1, 1), (rows - 2, rows - 2))
+
+#The part of the grid shown in the window: the node (row, col) at its top left corner and the zoom, in pixels per
+#node. Zooming in goes up to MAX_ZOOM whole pixels per node, zooming out goes down to fractions 1/2, 1/4...
+#of a pixel (only one node out of every 2, 4... is drawn then) until the whole grid fits in the window.
+class View:
+	def __init__(self, grid, width):
+		self.grid = grid
+		self.width = width
+		self.fit()
+
+	#Shows the whole grid
+	def fit(self):
+		self.zoom = self.min_zoom()
+		self.row = 0
+		self.col = 0
+		self.redraw = True
+
+	def min_zoom(self):
+		zoom = self.width // self.grid.rows
+		if zoom >= 1:
+			return zoom
+		step = 1
+		while self.grid.rows > self.width * step:
+			step *= 2
+		return 1 / step
+
+	#Nodes of the grid that fit across the window
+	def span(self):
+		return math.ceil(self.width / self.zoom)
+
+	#Keeps the window over the grid
+	def clamp(self):
+		limit = max(0, self.grid.rows - self.span())
+		self.row = min(max(self.row, 0), limit)
+		self.col = min(max(self.col, 0), limit)
+
+	#Moves the view by (x, y) pixels
+	def pan(self, x, y):
+		self.row -= x / self.zoom
+		self.col -= y / self.zoom
+		self.clamp()
+		self.redraw = True
+
+	#Zooms in (or out) by a factor of 2, keeping the node under the pixel pos where it is
+	def zoom_at(self, pos, zoom_in):
+		zoom = self.zoom * 2 if zoom_in else self.zoom / 2
+		if zoom >= 1:
+			zoom = round(zoom)
+		zoom = min(max(zoom, self.min_zoom()), MAX_ZOOM)
+		if zoom == self.zoom:
+			return
+		x, y = pos
+		row = self.row + x / self.zoom
+		col = self.col + y / self.zoom
+		self.zoom = zoom
+		self.row = row - x / zoom
+		self.col = col - y / zoom
+		self.clamp()
+		self.redraw = True
+
+	#The (row, col) of the node at the pixel pos, or None outside of the grid
+	def node_at(self, pos):
+		x, y = pos
+		row = int(self.row) + int(x // self.zoom)
+		col = int(self.col) + int(y // self.zoom)
+		if 0 <= row < self.grid.rows and 0 <= col < self.grid.rows:
+			return row, col
+		return None
+
+	#Grid lines are only drawn once nodes are big enough for them not to hide the nodes
+	def lines(self):
+		return self.zoom >= GRID_LINE_ZOOM
+
+	#The pixels of a node in the window (inside its grid lines when they are drawn), or None when it is not visible
+	def rect(self, cell):
+		row, col = divmod(cell, self.grid.rows)
+		x = (row - int(self.row)) * self.zoom
+		y = (col - int(self.col)) * self.zoom
+		if x < 0 or y < 0 or x >= self.width or y >= self.width:
+			return None
+		if self.lines():
+			return (x + 1, y + 1, self.zoom - 1, self.zoom - 1)
+		return (x, y, self.zoom, self.zoom)
+
+#Pixels per node of the closest zoom
+MAX_ZOOM = 64
+#Pixels per node from which the grid lines are drawn
+GRID_LINE_ZOOM = 4
+
+#RGB colors of the state codes, to color the state array of the grid in one go
+COLOR_TABLE = np.array(COLORS, dtype=np.uint8)
+
+#This method uses the zoom to "skip" over the white node body and draw grid lines at the borders of the visible nodes
+def draw_grid(window, view):
+	width = view.width
+	for i in range(view.span() + 1):
+		pygame.draw.line(window, GREY, (0, i * view.zoom), (width, i * view.zoom)) #horizontal lines
+		pygame.draw.line(window, GREY, (i * view.zoom, 0), (i * view.zoom, width)) #vertical lines
+
+#Paints the nodes visible in the view at once: the part of the state array they cover is colored through
+#COLOR_TABLE into an image that is scaled up to the zoom (or that only holds every step-th node when zoomed out)
+def draw_view(window, grid, view):
+	window.fill(WHITE)
+	row = int(view.row)
+	col = int(view.col)
+	span = view.span()
+	step = 1 if view.zoom >= 1 else round(1 / view.zoom)
+	visible = grid.state[row:row + span:step, col:col + span:step]
+
+	#Surface arrays are indexed [x][y], which is [row][col] here as x = row * gap
+	surface = pygame.surfarray.make_surface(COLOR_TABLE[visible])
+	if view.zoom > 1:
+		surface = pygame.transform.scale(surface, (visible.shape[0] * view.zoom, visible.shape[1] * view.zoom))
+	window.blit(surface, (0, 0))
+
+	if view.lines():
+		draw_grid(window, view)
+
+#This method paints the window: the whole view when it moved (or a new grid is shown) and otherwise only the
+#nodes that changed since the last frame, updating just their rectangles on the display
+#(zoomed out below a pixel per node the nodes do not have rectangles of their own, so the whole view is painted)
+def draw(window, grid, view):
+	if view.grid is not grid:
+		view.grid = grid
+		view.fit()
+	if view.redraw or (grid.changed and view.zoom < 1):
+		draw_view(window, grid, view)
+		grid.changed.clear()
+		view.redraw = False
+		pygame.display.update()
+		return
+
+	if not grid.changed:
+		return
+	cells = grid.cells
+	rects = []
+	for cell in grid.changed:
+		rect = view.rect(cell)
+		if rect is not None:
+			pygame.draw.rect(window, COLORS[cells[cell]], rect)
+			rects.append(rect)
+	grid.changed.clear()
+	pygame.display.update(rects)
+
+#This method converts all continuous x,y values within a node to a single row,col pair of that node
+#(None when the mouse is not over the grid)
+def get_clicked_pos(pos, view):
+	return view.node_at(pos)
+
+#Pixels the arrow keys move the view by
+PAN_STEP = 200
+
+
+#The mouse wheel zooms in and out around the mouse, the arrow keys or dragging with the middle button pan the view
+#and the f key fits the whole grid in the window again
+#The s key saves the barriers, start and end node as the scenario file save_file
+def main(window, width, rows=50, scenario=None, save_file="scenario.json"):
+	#Without a scenario the grid starts out empty, with the start node in the top left corner and the end node in
+	#the bottom right corner
+	if scenario is None:
+		scenario = empty_scenario(rows)
+	grid, start, end = scenario_grid(scenario, width)
+	view = View(grid, width)
+	redraw = lambda: draw(window, grid, view)
+
+	#In incremental mode (toggled with the d key) a D* Lite planner keeps the plan up to date: every barrier edit
+	#is handed to it and the plan is repaired on the next frame, instead of searching again from scratch
+	planner = None
+	edited = []
+	plan = []
 
 	run = True
 	while run:
-		draw(window, grid, rows, width)
+		if planner is not None and edited:
+			planner.update_cells(edited)
+			edited = []
+			plan = paint_plan(grid, planner.plan(), plan)
+		draw(window, grid, view)
 		for event in pygame.event.get():
                         #If the exit icon is clicked on the pygame window, exit while loop
 			if event.type == pygame.QUIT:
 				run = False
 
                         #Left mouse click registration (enter start/end/barriers, in that order)
+			#The start, end and border nodes cannot be edited
 			if pygame.mouse.get_pressed()[0]:
-				pos = pygame.mouse.get_pos()
-				row, col = get_clicked_pos(pos, rows, width)
-				node = grid[row][col]
-				node.make_barrier()
+				pos = get_clicked_pos(pygame.mouse.get_pos(), view)
+				node = None if pos is None else grid[pos[0]][pos[1]]
+				if node and node != start and node != end and not node.is_border() and not node.is_barrier():
+					node.make_barrier()
+					edited.append(node.cell)
 
                         #Right mouse click registration (undo an entry)
 			elif pygame.mouse.get_pressed()[2]: 
-				pos = pygame.mouse.get_pos()
-				row, col = get_clicked_pos(pos, rows, width)
-				node = grid[row][col]
-				node.reset()
-				if node == start:
-					start = start
-				elif node == end:
-					end = end
+				pos = get_clicked_pos(pygame.mouse.get_pos(), view)
+				node = None if pos is None else grid[pos[0]][pos[1]]
+				if node and node != start and node != end and not node.is_border():
+					if node.is_barrier():
+						edited.append(node.cell)
+					node.reset()
+
+			if event.type == pygame.MOUSEWHEEL and event.y != 0:
+				view.zoom_at(pygame.mouse.get_pos(), event.y > 0)
+
+			if event.type == pygame.MOUSEMOTION and event.buttons[1]:
+				view.pan(*event.rel)
 
                         #Start search when the space bar is pressed only if start and end nodes are defined
 			if event.type == pygame.KEYDOWN:
 				if event.key == pygame.K_SPACE and start and end:
-					for row in grid:
-						for node in row:
-							node.update_neighbors(grid)
-
-					algorithm(lambda: draw(window, grid, rows, width), grid, start, end)
-
-                                #Clear window from all user input for barriers (that are not borders)
+					if planner is None:
+						algorithm(redraw, grid, start, end)
+					else:
+						plan = paint_plan(grid, planner.plan(), plan)
+
+				#The b key runs a bidirectional search instead
+				if event.key == pygame.K_b and start and end and planner is None:
+					algorithm(redraw, grid, start, end, bidirectional_astar)
+
+				if event.key == pygame.K_LEFT:
+					view.pan(PAN_STEP, 0)
+				if event.key == pygame.K_RIGHT:
+					view.pan(-PAN_STEP, 0)
+				if event.key == pygame.K_UP:
+					view.pan(0, PAN_STEP)
+				if event.key == pygame.K_DOWN:
+					view.pan(0, -PAN_STEP)
+				if event.key == pygame.K_f:
+					view.fit()
+
+				if event.key == pygame.K_d:
+					clear_search(grid)
+					edited = []
+					plan = []
+					if planner is None:
+						planner = DStar_Lite(grid, start, end)
+						plan = paint_plan(grid, planner.plan(), plan)
+					else:
+						planner = None
+
+				if event.key == pygame.K_s:
+					save_scenario(save_file, grid, start, end)
+					print("Saved " + save_file)
+
+                                #Clear window from all user input for barriers (back to the barriers of the scenario)
 				if event.key == pygame.K_c:
-					grid = make_grid(rows, width)
-					#Defining start node in top left corner (after reset)
-					start = grid[1][1]
-					start.make_start()
+					grid, start, end = scenario_grid(scenario, width)
+					view = View(grid, width)
 
-					#Defining end node in bottom right corner (after reset)
-					end = grid[rows-2][rows-2]
-					end.make_end()
+					edited = []
+					plan = []
+					if planner is not None:
+						planner = DStar_Lite(grid, start, end)
+						plan = paint_plan(grid, planner.plan(), plan)
 
         #quit pygame if the while loop is terminated
 	pygame.quit()
 
-main(window, width)
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Interactive A* path planner on an 8 connected grid")
+	parser.add_argument("--rows", type=int, default=50, help="rows (and columns) of an empty grid (default: %(default)s)")
+	parser.add_argument("--width", type=int, default=width, help="size of the window in pixels (default: %(default)s)")
+	parser.add_argument("--map", help="barrier layout to start from (.npy file or image, dark pixels are barriers)")
+	parser.add_argument("--scenario", help="scenario file to start from (its layout, start and goal)")
+	parser.add_argument("--save", default="scenario.json",
+		help="scenario file the s key saves to (default: %(default)s)")
+	args = parser.parse_args()
+
+	if args.scenario is not None:
+		scenario = load_scenario(args.scenario)
+	elif args.map is not None:
+		scenario = layout_scenario(args.map)
+	else:
+		scenario = empty_scenario(args.rows)
+	error = check_scenario(scenario)
+	assert error is None, "Incorrect scenario: " + str(error)
+
+	assert pygame is not None, "The interactive planner needs pygame, use astar() to search without it"
+	window = pygame.display.set_mode((args.width, args.width))
+	pygame.display.set_caption("Path Finding Algorithm")
+	main(window, args.width, len(scenario.layout), scenario, args.save)
+
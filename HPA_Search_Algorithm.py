@@ -0,0 +1,328 @@
+import sys
+import argparse
+import json
+import os
+import time
+from heapq import heappop, heappush
+import numpy as np
+
+from ANA_Search_Algorithm import (Occupancy_Map, astar, eucledian, load_map, map_cache_file, read_queries,
+	save_cache_file)
+
+'''
+Hierarchical path-finding (HPA*, Botea, Mueller & Schaeffer) over the occupancy grids of the ANA* maps.
+The grid is partitioned into square clusters and every maximal run of free cells shared by two neighboring
+clusters (an entrance) contributes one or two transitions, i.e. pairs of facing cells that become nodes of an
+abstract graph. Transitions are joined by inter-cluster edges (a single move) and the nodes of a cluster by
+intra-cluster edges (their exact distance inside the cluster). A query only searches the small abstract graph
+and then refines the edges of the chosen path cluster by cluster with the existing A* search. The paths are
+near-optimal (they must cross clusters through transitions) rather than optimal.
+'''
+
+DEFAULT_CLUSTER_SIZE = 32
+
+#Entrances at least this wide get a transition at both of their ends instead of a single one in their middle
+MAX_ENTRANCE_WIDTH = 6
+
+#Bumped whenever the layout of stored abstractions changes so that stale files are never loaded
+ABSTRACTION_CACHE_VERSION = 1
+
+#Distance (in moves) from the source cell to every cell of its cluster reachable without leaving the cluster
+def cluster_distances(map, bounds, source):
+	x0, y0, x1, y1 = bounds
+	height = map.height
+	cells = map.cells
+	steps = map.steps
+
+	distances = {source: 0}
+	frontier = [source]
+	distance = 0
+	while frontier:
+		distance += 1
+		next_frontier = []
+		for cell in frontier:
+			for step in steps[cells[cell]]:
+				successor = cell + step
+				if successor in distances:
+					continue
+				x, y = divmod(successor, height)
+				if x0 <= x < x1 and y0 <= y < y1:
+					distances[successor] = distance
+					next_frontier.append(successor)
+		frontier = next_frontier
+
+	return distances
+
+class Abstraction:
+
+	def __init__(self, map, cluster_size=DEFAULT_CLUSTER_SIZE, edges=None):
+		self.map = map
+		self.cluster_size = cluster_size
+		self.columns = -(-map.width // cluster_size)
+		self.rows = -(-map.height // cluster_size)
+
+		#entrances[(cluster, neighbor)] lists the (cell in cluster, cell in neighbor) transitions between the two
+		#clusters (the neighbor is always the one to the right or below), intra[cluster] maps every node of the
+		#cluster to its (node, cost) intra-cluster edges
+		self.entrances = {}
+		self.intra = {}
+		self.inter = {}
+		self.submaps = {}
+
+		if edges is None:
+			for cluster in self.clusters():
+				for neighbor in self.next_clusters(cluster):
+					self.entrances[(cluster, neighbor)] = self.find_entrances(cluster, neighbor)
+			for cluster in self.clusters():
+				self.intra[cluster] = self.intra_edges(cluster)
+		else:
+			self.load_edges(edges)
+
+		self.link_entrances()
+
+	def clusters(self):
+		return [(cx, cy) for cx in range(self.columns) for cy in range(self.rows)]
+
+	def cluster_of(self, cell):
+		x, y = divmod(cell, self.map.height)
+		return (x // self.cluster_size, y // self.cluster_size)
+
+	#(x0, y0, x1, y1) pixel bounds of a cluster, the last clusters of a row or column may be smaller
+	def bounds(self, cluster):
+		x0 = cluster[0] * self.cluster_size
+		y0 = cluster[1] * self.cluster_size
+		return x0, y0, min(x0 + self.cluster_size, self.map.width), min(y0 + self.cluster_size, self.map.height)
+
+	#the neighbors to the right and below a cluster (every pair of neighbors is only visited once)
+	def next_clusters(self, cluster):
+		cx, cy = cluster
+		return [neighbor for neighbor in ((cx + 1, cy), (cx, cy + 1))
+			if neighbor[0] < self.columns and neighbor[1] < self.rows]
+
+	def adjacent_clusters(self, cluster):
+		cx, cy = cluster
+		return [neighbor for neighbor in ((cx + 1, cy), (cx, cy + 1), (cx - 1, cy), (cx, cy - 1))
+			if 0 <= neighbor[0] < self.columns and 0 <= neighbor[1] < self.rows]
+
+	def find_entrances(self, cluster, neighbor):
+		x0, y0, x1, y1 = self.bounds(cluster)
+		occupied = self.map.occupied
+		cell = self.map.cell
+
+		#the facing cells of the border, (inside, outside) pairs along it
+		if neighbor[0] > cluster[0]:
+			open_border = ~(np.asarray(occupied[x1 - 1, y0:y1]) | np.asarray(occupied[x1, y0:y1]))
+			pairs = [(cell(x1 - 1, y), cell(x1, y)) for y in range(y0, y1)]
+		else:
+			open_border = ~(np.asarray(occupied[x0:x1, y1 - 1]) | np.asarray(occupied[x0:x1, y1]))
+			pairs = [(cell(x, y1 - 1), cell(x, y1)) for x in range(x0, x1)]
+
+		transitions = []
+		run_start = None
+		for i, is_open in enumerate(open_border.tolist() + [False]):
+			if is_open and run_start is None:
+				run_start = i
+			elif not is_open and run_start is not None:
+				if i - run_start < MAX_ENTRANCE_WIDTH:
+					transitions.append(pairs[(run_start + i - 1) // 2])
+				else:
+					transitions.append(pairs[run_start])
+					transitions.append(pairs[i - 1])
+				run_start = None
+
+		return transitions
+
+	#The nodes of a cluster are its cells that belong to a transition
+	def nodes(self, cluster):
+		nodes = []
+		for neighbor in self.adjacent_clusters(cluster):
+			if (cluster, neighbor) in self.entrances:
+				nodes += [inside for inside, outside in self.entrances[(cluster, neighbor)]]
+			else:
+				nodes += [outside for inside, outside in self.entrances[(neighbor, cluster)]]
+		return sorted(set(nodes))
+
+	def intra_edges(self, cluster):
+		bounds = self.bounds(cluster)
+		nodes = self.nodes(cluster)
+		edges = {}
+		for node in nodes:
+			distances = cluster_distances(self.map, bounds, node)
+			edges[node] = [(other, distances[other]) for other in nodes if other != node and other in distances]
+		return edges
+
+	def link_entrances(self):
+		self.inter = {}
+		for transitions in self.entrances.values():
+			for inside, outside in transitions:
+				self.inter.setdefault(inside, []).append((outside, 1))
+				self.inter.setdefault(outside, []).append((inside, 1))
+
+	#Incremental rebuild after the occupancy of a cluster changed (given the edited map, or with the current map
+	#already holding the new occupancy): only the entrances on the borders of the cluster and the intra edges of
+	#the cluster and of its neighbors (whose nodes may have moved) are recomputed
+	def rebuild_cluster(self, cluster, map=None):
+		if map is not None:
+			self.map = map
+
+		for neighbor in self.adjacent_clusters(cluster):
+			if (cluster, neighbor) in self.entrances:
+				self.entrances[(cluster, neighbor)] = self.find_entrances(cluster, neighbor)
+			else:
+				self.entrances[(neighbor, cluster)] = self.find_entrances(neighbor, cluster)
+
+		for changed in [cluster] + self.adjacent_clusters(cluster):
+			self.intra[changed] = self.intra_edges(changed)
+			self.submaps.pop(changed, None)
+
+		self.link_entrances()
+
+	#All edges as a (count, 3) int32 array of (node, node, cost) rows, inter-cluster edges being the rows whose
+	#nodes lie in different clusters
+	def edges(self):
+		rows = []
+		for transitions in self.entrances.values():
+			rows += [(inside, outside, 1) for inside, outside in transitions]
+		for edges in self.intra.values():
+			for node, others in edges.items():
+				rows += [(node, other, cost) for other, cost in others]
+		return np.array(rows, dtype=np.int32).reshape(-1, 3)
+
+	def load_edges(self, edges):
+		for cluster in self.clusters():
+			self.intra[cluster] = {}
+			for neighbor in self.next_clusters(cluster):
+				self.entrances[(cluster, neighbor)] = []
+
+		for node, other, cost in edges.tolist():
+			cluster = self.cluster_of(node)
+			neighbor = self.cluster_of(other)
+			if cluster != neighbor:
+				self.entrances[(cluster, neighbor)].append((node, other))
+			else:
+				self.intra[cluster].setdefault(node, []).append((other, cost))
+
+	#The map of a single cluster, for refining the abstract path inside it with the existing search
+	def submap(self, cluster):
+		if cluster not in self.submaps:
+			x0, y0, x1, y1 = self.bounds(cluster)
+			self.submaps[cluster] = Occupancy_Map(np.array(self.map.occupied[x0:x1, y0:y1]))
+		return self.submaps[cluster]
+
+	#Connects a query cell (start or goal) to the nodes of its cluster with temporary edges
+	def insert(self, cell, extra):
+		cluster = self.cluster_of(cell)
+		distances = cluster_distances(self.map, self.bounds(cluster), cell)
+		for node in self.nodes(cluster):
+			if node in distances and node != cell:
+				extra.setdefault(cell, []).append((node, distances[node]))
+				extra.setdefault(node, []).append((cell, distances[node]))
+		return distances
+
+	def query(self, start, goal):
+		"""
+		Finds a path from start to goal ((x,y) tuples) through the abstract graph and refines it.
+		Returns the path (a list of (x,y) tuples, empty if none was found), its cost and the number of
+		abstract plus refinement expansions.
+		"""
+		if not (self.map.free(*start) and self.map.free(*goal)):
+			return [], None, 0
+
+		start_cell = self.map.cell(*start)
+		goal_cell = self.map.cell(*goal)
+
+		extra = {}
+		self.insert(start_cell, extra)
+		goal_distances = self.insert(goal_cell, extra)
+		#start and goal in the same cluster may also be joined directly
+		if self.cluster_of(start_cell) == self.cluster_of(goal_cell) and start_cell in goal_distances:
+			extra.setdefault(start_cell, []).append((goal_cell, goal_distances[start_cell]))
+
+		abstract_path, cost, expansions = self.abstract_search(start_cell, goal_cell, extra)
+		if not abstract_path:
+			return [], None, expansions
+
+		path = [start]
+		for node, next_node in zip(abstract_path, abstract_path[1:]):
+			cluster = self.cluster_of(node)
+			if cluster != self.cluster_of(next_node):
+				path.append(self.map.point(next_node))
+				continue
+
+			x0, y0, x1, y1 = self.bounds(cluster)
+			x, y = self.map.point(node)
+			next_x, next_y = self.map.point(next_node)
+			segment, segment_cost, segment_expansions = astar(self.submap(cluster), (x - x0, y - y0),
+				(next_x - x0, next_y - y0))
+			expansions += segment_expansions
+			path += [(x0 + px, y0 + py) for px, py in segment[1:]]
+
+		return path, cost, expansions
+
+	def abstract_search(self, start, goal, extra):
+		height = self.map.height
+		goal_point = divmod(goal, height)
+		explored = {start: 0}
+		parent_linked = {start: None}
+		front = [(eucledian(divmod(start, height), goal_point), 0, start)]
+		expansions = 0
+
+		while front:
+			f_s, g_s, state = heappop(front)
+			if g_s > explored[state]:
+				continue
+
+			if state == goal:
+				path = []
+				while state is not None:
+					path.append(state)
+					state = parent_linked[state]
+				path.reverse()
+				return path, g_s, expansions
+
+			expansions += 1
+			cluster = self.cluster_of(state)
+			successors = self.intra[cluster].get(state, []) + self.inter.get(state, []) + extra.get(state, [])
+			for successor, cost in successors:
+				new_cost = g_s + cost
+				if successor not in explored or new_cost < explored[successor]:
+					explored[successor] = new_cost
+					parent_linked[successor] = state
+					heappush(front, (new_cost + eucledian(divmod(successor, height), goal_point), new_cost, successor))
+
+		return [], None, expansions
+
+#Abstractions are stored next to the prepared map file (named after the same image hash) as their edge array
+def prepare_abstraction(filename, cache_dir, cluster_size=DEFAULT_CLUSTER_SIZE):
+	cache_file = map_cache_file(filename, cache_dir)[:-len(".npy")] + ".hpa-%d-%d.npy" % (
+		ABSTRACTION_CACHE_VERSION, cluster_size)
+	if not os.path.exists(cache_file):
+		save_cache_file(cache_file, Abstraction(load_map(filename, cache_dir), cluster_size).edges())
+
+	return cache_file
+
+def load_abstraction(filename, cluster_size=DEFAULT_CLUSTER_SIZE, cache_dir=None):
+	map = load_map(filename, cache_dir)
+	if cache_dir is None:
+		return Abstraction(map, cluster_size)
+
+	return Abstraction(map, cluster_size, np.load(prepare_abstraction(filename, cache_dir, cluster_size)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hierarchical (HPA*) search over an ANA* map image")
+    parser.add_argument("map", help="map image to search")
+    parser.add_argument("queries", help="file of 'start_x start_y goal_x goal_y' lines, one JSON line is printed per query")
+    parser.add_argument("--cluster-size", type=int, default=DEFAULT_CLUSTER_SIZE, help="width of the square clusters")
+    parser.add_argument("--cache-dir", metavar="DIR", help="store the map and its abstraction in this directory")
+    args = parser.parse_args()
+
+    abstraction = load_abstraction(args.map, args.cluster_size, args.cache_dir)
+    for query_start, query_goal in read_queries(args.queries):
+        start_t = time.perf_counter()
+        path, cost, expansions = abstraction.query(query_start, query_goal)
+        result = {"start": list(query_start), "goal": list(query_goal), "found": bool(path),
+                  "path_length": len(path), "cost": cost, "expansions": expansions,
+                  "time": time.perf_counter() - start_t}
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
@@ -2,6 +2,7 @@ import pygame
 import math
 import random
 import time
+import numpy as np
 
 #This class is for the visualization element (front end)
 class RRTMap:
@@ -48,6 +49,109 @@ class RRTMap:
             pygame.draw.rect(self.map,self.Grey,obstacle)
 
 
+#Spatial index of the tree nodes: a uniform grid of square buckets holding the node numbers by position, so that
+#the nearest node to a point is found by searching the buckets in rings around the point instead of measuring the
+#distance to every node of the tree. Whenever the tree outgrows the grid (more than maxLoad nodes per bucket of the
+#map on average) the bucket size is halved and the buckets are rebuilt, which keeps buckets small as the tree grows
+#Nodes are only ever added and removed at the end of the tree, so node numbers never shift
+class NodeGrid:
+    def __init__(self,MapDim,cellSize=32,maxLoad=4):
+        self.MapH,self.MapW = MapDim
+        self.cellSize = cellSize
+        self.maxLoad = maxLoad
+        self.buckets = {}
+        self.pos = {}
+        #smallest and largest bucket coordinates used so far, nearest() never searches beyond them
+        self.bounds = None
+
+    def __len__(self):
+        return len(self.pos)
+
+    def key(self,x,y):
+        return (int(x//self.cellSize),int(y//self.cellSize))
+
+    def add(self,n,x,y):
+        self.pos[n] = (x,y)
+        self.insert(n,x,y)
+        cells = math.ceil(self.MapW/self.cellSize)*math.ceil(self.MapH/self.cellSize)
+        if self.cellSize > 1 and len(self.pos) > self.maxLoad*cells:
+            self.rebuild(max(1,self.cellSize//2))
+
+    def insert(self,n,x,y):
+        (kx,ky) = self.key(x,y)
+        self.buckets.setdefault((kx,ky),[]).append(n)
+        if self.bounds is None:
+            self.bounds = [kx,ky,kx,ky]
+        else:
+            bounds = self.bounds
+            bounds[0] = min(bounds[0],kx)
+            bounds[1] = min(bounds[1],ky)
+            bounds[2] = max(bounds[2],kx)
+            bounds[3] = max(bounds[3],ky)
+
+    def remove(self,n):
+        (x,y) = self.pos.pop(n)
+        key = self.key(x,y)
+        bucket = self.buckets[key]
+        bucket.remove(n)
+        if not bucket:
+            del self.buckets[key]
+
+    def rebuild(self,cellSize):
+        self.cellSize = cellSize
+        self.buckets = {}
+        self.bounds = None
+        for n,(x,y) in self.pos.items():
+            self.insert(n,x,y)
+
+    #nearest node to (x,y) other than exclude (ties go to the lowest node number, like a linear scan would)
+    #after searching the ring of buckets r away from the bucket of the point, any node left is at least r buckets
+    #away, so the search stops as soon as the best node found is closer than that
+    def nearest(self,x,y,exclude=None):
+        if self.bounds is None:
+            return None
+        (cx,cy) = self.key(x,y)
+        (minx,miny,maxx,maxy) = self.bounds
+        reach = max(cx-minx,maxx-cx,cy-miny,maxy-cy)
+        best = None
+        r = 0
+        while r <= reach:
+            if r == 0:
+                ring = [(cx,cy)]
+            else:
+                ring = [(i,cy-r) for i in range(cx-r,cx+r+1)] + [(i,cy+r) for i in range(cx-r,cx+r+1)]
+                ring += [(cx-r,j) for j in range(cy-r+1,cy+r)] + [(cx+r,j) for j in range(cy-r+1,cy+r)]
+            for key in ring:
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    continue
+                for n in bucket:
+                    if n == exclude:
+                        continue
+                    (px,py) = self.pos[n]
+                    candidate = ((px-x)**2+(py-y)**2,n)
+                    if best is None or candidate < best:
+                        best = candidate
+            if best is not None and best[0] < (r*self.cellSize)**2:
+                break
+            r += 1
+        return None if best is None else best[1]
+
+    #all nodes within radius of (x,y), in increasing node number
+    def near(self,x,y,radius):
+        (x1,y1) = self.key(x-radius,y-radius)
+        (x2,y2) = self.key(x+radius,y+radius)
+        nodes = []
+        for i in range(x1,x2+1):
+            for j in range(y1,y2+1):
+                for n in self.buckets.get((i,j),()):
+                    (px,py) = self.pos[n]
+                    if (px-x)**2+(py-y)**2 <= radius**2:
+                        nodes.append(n)
+        nodes.sort()
+        return nodes
+
+
 #This class is for defining and editing nodes and edges (backend)
 class RRTGraph:
     def __init__(self,start,goal,MapDim,obsdim,obsnum):
@@ -66,7 +170,10 @@ class RRTGraph:
         self.x.append(x)
         self.y.append(y)
         self.parent.append(0)
-        #defining obstacles in the workspace
+        #spatial index of the nodes for the nearest node queries
+        self.index = NodeGrid(MapDim)
+        self.index.add(0,x,y)
+        #defining obstacles in the workspace (see the obs property)
         self.obs = []
         self.obsdim = obsdim
         self.obsnum = obsnum
@@ -75,35 +182,77 @@ class RRTGraph:
         self.path = []
 
 
-    def makeRandomRect(self):
-        cornerx=int(random.uniform(0,self.MapW-self.obsdim))
-        cornery=int(random.uniform(0,self.MapH-self.obsdim))
-        return (cornerx,cornery)
-
+    #the obstacles are a list of pygame.Rect, also kept as NumPy arrays of their bounds for the collision checks
+    #and as an occupancy raster of the map (one boolean per pixel, indexed [y,x]) for the point checks
+    #(both are rebuilt whenever the list is assigned, so a new list has to be assigned rather than edited)
+    @property
+    def obs(self):
+        return self.obsList
+
+    @obs.setter
+    def obs(self,obs):
+        self.obsList = obs
+        self.obsLeft = np.array([rectangle.left for rectangle in obs],dtype=float)
+        self.obsTop = np.array([rectangle.top for rectangle in obs],dtype=float)
+        self.obsRight = np.array([rectangle.right for rectangle in obs],dtype=float)
+        self.obsBottom = np.array([rectangle.bottom for rectangle in obs],dtype=float)
+        self.occupancy = self.rasterize()
+
+    #a pixel is occupied when it is inside a rectangle, i.e. when rectangle.collidepoint() is true for it
+    #every rectangle adds +1 at its top left corner and -1 past its right and bottom sides to a difference array,
+    #whose cumulative sums along both axes then count the rectangles covering each pixel, for all of them at once
+    def rasterize(self):
+        left = np.clip(self.obsLeft,0,self.MapW).astype(int)
+        right = np.clip(self.obsRight,0,self.MapW).astype(int)
+        top = np.clip(self.obsTop,0,self.MapH).astype(int)
+        bottom = np.clip(self.obsBottom,0,self.MapH).astype(int)
+        inside = (left < right) & (top < bottom)
+        (left,right,top,bottom) = (left[inside],right[inside],top[inside],bottom[inside])
+
+        counts = np.zeros((self.MapH+1,self.MapW+1),dtype=np.int32)
+        np.add.at(counts,(top,left),1)
+        np.add.at(counts,(top,right),-1)
+        np.add.at(counts,(bottom,left),-1)
+        np.add.at(counts,(bottom,right),1)
+        return counts.cumsum(axis=0).cumsum(axis=1)[:self.MapH,:self.MapW] > 0
+
+    #is the point (x,y) inside an obstacle? a single lookup in the raster whatever the number of obstacles
+    #(points off the map are checked against the bounds of every obstacle instead)
+    def occupied(self,x,y):
+        (col,row) = (math.floor(x),math.floor(y))
+        if 0 <= row < self.MapH and 0 <= col < self.MapW:
+            return bool(self.occupancy[row,col])
+        return bool(np.any((self.obsLeft <= x) & (x < self.obsRight) & (self.obsTop <= y) & (y < self.obsBottom)))
+
+    #the obstacles are generated in bulk: corners are drawn for all the missing rectangles at once and the ones
+    #whose rectangle would cover the start or goal node are thrown away (and drawn again)
+    #a start or goal on the right or bottom side of a rectangle counts as covered: x_obs() counts touching a side as
+    #a collision, so every edge leaving that node would be rejected and its tree could never grow
+    #the corners come from a NumPy generator seeded from the random module, so random.seed() still reproduces them
     def makeObs(self):
-        obs = []
-        for i in range(0,self.obsnum):
-            rectangle = None
-            startgoal = True
-            #keep re-trying to make rectangular obstacle as long as start and goal nodes are not within that rectangle
-            while startgoal:
-                upper = self.makeRandomRect()
-                rectangle = pygame.Rect(upper,(self.obsdim,self.obsdim))
-                if rectangle.collidepoint(self.start) or rectangle.collidepoint(self.goal):
-                    startgoal = True
-                else:
-                    startgoal = False
-            obs.append(rectangle)
+        rng = np.random.default_rng(random.getrandbits(64))
+        corners = np.empty((0,2),dtype=int)
+        while len(corners) < self.obsnum:
+            missing = self.obsnum-len(corners)
+            cornerx = (rng.random(missing)*(self.MapW-self.obsdim)).astype(int)
+            cornery = (rng.random(missing)*(self.MapH-self.obsdim)).astype(int)
+            startgoal = np.zeros(missing,dtype=bool)
+            for (x,y) in (self.start,self.goal):
+                startgoal |= (cornerx <= x) & (x <= cornerx+self.obsdim) & (cornery <= y) & (y <= cornery+self.obsdim)
+            corners = np.concatenate((corners,np.column_stack((cornerx,cornery))[~startgoal]))
+        obs = [pygame.Rect((int(x),int(y)),(self.obsdim,self.obsdim)) for (x,y) in corners]
         self.obs = obs.copy()
         return obs
 
     def add_node(self,n,x,y):
         self.x.insert(n,x)
         self.y.append(y)
+        self.index.add(n,x,y)
 
     def remove_node(self,n):
         self.x.pop(n)
         self.y.pop(n)
+        self.index.remove(n)
 
     def add_edge(self,parent,child):
         self.parent.insert(child,parent)
@@ -128,43 +277,47 @@ class RRTGraph:
         y = int(random.uniform(0,self.MapH))
         return x,y
 
-    #measures distance from new (random) node to every other node in the tree
+    #finds the node of the tree nearest to the new (random) node through the spatial index
+    #(only the buckets around the new node are searched instead of measuring the distance to every node)
     def nearest(self,n):
-        dmin = self.distance(0,n)
-        nnear = 0
-        for i in range(0,n):
-            #looping through all n nodes to find the node with lowest dmin (nearest)
-            if self.distance(i,n)<dmin:
-                dmin = self.distance(i,n)
-                nnear = i
-        return nnear
+        nnear = self.index.nearest(self.x[n],self.y[n],n)
+        return 0 if nnear is None else nnear
+
+    #nodes of the tree within radius of node n (n itself excluded)
+    def near(self,n,radius):
+        return [i for i in self.index.near(self.x[n],self.y[n],radius) if i != n]
 
     #is the newly generated random node in C_free?
     def isFree(self):
         n = self.total_nodes()-1
         (x,y) = (self.x[n],self.y[n])
-        obst = self.obs.copy()
-        while len(obst)>0:
-            rectangle = obst.pop(0)
-            if rectangle.collidepoint(x,y):
-                self.remove_node(n)
-                return False
+        if self.occupied(x,y):
+            self.remove_node(n)
+            return False
         return True
 
     #is the edge between two nodes crossing any obstacles?
     #this method returns True for collision path and False for free path
+    #the test is exact (slab method) and runs over all obstacles at once: along each axis the segment
+    #(x1,y1)+u*(x2-x1,y2-y1), 0<=u<=1, is inside the slab between the two sides of a rectangle for an interval of u,
+    #and it crosses the rectangle when the intervals of the two axes overlap (touching a side counts as crossing,
+    #which is why makeObs() keeps the start and goal off every side of the rectangles, not just out of them)
     def x_obs(self,x1,x2,y1,y2):
-        obst = self.obs.copy()
-        while len(obst)>0:
-            rectangle = obst.pop(0)
-            #using interpolation to check for 100 pts on the line for collision
-            for i in range(0,301):
-                u = i/300
-                x = x1*u + x2*(1-u)
-                y = y1*u + y2*(1-u)
-                if rectangle.collidepoint(x,y):
-                    return True
-        return False
+        if len(self.obsList) == 0:
+            return False
+        enter = np.zeros(len(self.obsList))
+        leave = np.ones(len(self.obsList))
+        for (p,d,low,high) in ((x1,x2-x1,self.obsLeft,self.obsRight),(y1,y2-y1,self.obsTop,self.obsBottom)):
+            if d == 0:
+                #parallel to the slab: either always inside it or never
+                outside = (p < low) | (p > high)
+                leave = np.where(outside,-1.0,leave)
+            else:
+                t1 = (low-p)/d
+                t2 = (high-p)/d
+                enter = np.maximum(enter,np.minimum(t1,t2))
+                leave = np.minimum(leave,np.maximum(t1,t2))
+        return bool(np.any(enter <= leave))
 
     def connect(self,n1,n2):
         (x1,y1) = (self.x[n1],self.y[n1])